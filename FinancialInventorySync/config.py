@@ -1,12 +1,21 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Snapshot of the environment after .env is applied; deployment settings
+# don't change while the process runs
+_ENV = dict(os.environ)
+
 class Config:
     # Telegram Configuration
     TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "your_bot_token_here")
+    # Receive updates on the webhook server instead of long polling
+    TELEGRAM_USE_WEBHOOK = os.getenv("TELEGRAM_USE_WEBHOOK", "false").lower() in ("1", "true", "yes")
+    TELEGRAM_WEBHOOK_PATH = "/telegram/webhook"
+    TELEGRAM_WEBHOOK_SECRET = os.getenv("TELEGRAM_WEBHOOK_SECRET", "")
     
     # Twilio Configuration
     TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID", "your_twilio_account_sid")
@@ -29,32 +38,53 @@ class Config:
     MAX_AUDIO_FILE_SIZE = int(os.getenv("MAX_AUDIO_FILE_SIZE", "52428800"))  # 50MB
     
     # Admin Configuration
-    ADMIN_USER_IDS = [int(x.strip()) for x in os.getenv("ADMIN_USER_IDS", "").split(",") if x.strip()]
+    # Parsed once into a frozenset so admin checks are a hash lookup
+    ADMIN_USER_IDS = frozenset(int(x) for x in os.getenv("ADMIN_USER_IDS", "").split(",") if x.strip())
+    
+    # Configuration checks, evaluated once at import
+    # Twilio credentials are optional: without them the bot runs without calling
+    MISSING_TWILIO_VARS = tuple(
+        name for name, value in (
+            ('TWILIO_ACCOUNT_SID', TWILIO_ACCOUNT_SID),
+            ('TWILIO_AUTH_TOKEN', TWILIO_AUTH_TOKEN),
+            ('TWILIO_PHONE_NUMBER', TWILIO_PHONE_NUMBER),
+        )
+        if not value or value.startswith('your_')
+    )
+    # Problems that prevent the bot from starting
+    VALIDATION_ERRORS = (
+        ("❌ Missing TELEGRAM_BOT_TOKEN",)
+        if not TELEGRAM_BOT_TOKEN or TELEGRAM_BOT_TOKEN.startswith('your_') else ()
+    )
 
 # Auto-detect deployment platform for webhook URL
+@lru_cache(maxsize=1)
 def get_webhook_url():
     """Auto-detect webhook URL based on deployment platform"""
     base_url = Config.BASE_URL
     
     # Railway detection
-    if os.getenv("RAILWAY_ENVIRONMENT"):
-        railway_url = os.getenv("RAILWAY_PUBLIC_DOMAIN")
+    if _ENV.get("RAILWAY_ENVIRONMENT"):
+        railway_url = _ENV.get("RAILWAY_PUBLIC_DOMAIN")
         if railway_url:
             base_url = f"https://{railway_url}"
     
     # Replit detection
-    elif os.getenv("REPLIT_DB_URL"):
-        repl_slug = os.getenv("REPL_SLUG", "telegram-bot")
-        repl_owner = os.getenv("REPL_OWNER", "user")
+    elif _ENV.get("REPLIT_DB_URL"):
+        repl_slug = _ENV.get("REPL_SLUG", "telegram-bot")
+        repl_owner = _ENV.get("REPL_OWNER", "user")
         base_url = f"https://{repl_slug}.{repl_owner}.repl.co"
     
     # Heroku detection
-    elif os.getenv("DYNO"):
-        heroku_app = os.getenv("HEROKU_APP_NAME")
+    elif _ENV.get("DYNO"):
+        heroku_app = _ENV.get("HEROKU_APP_NAME")
         if heroku_app:
             base_url = f"https://{heroku_app}.herokuapp.com"
     
     return base_url
 
-# Create audio directory if it doesn't exist
-os.makedirs(Config.AUDIO_STORAGE_PATH, exist_ok=True)
+# Create audio directory if it doesn't exist; the flag survives
+# importlib.reload so the directory is only checked once per process
+if not globals().get('_audio_dir_ready'):
+    os.makedirs(Config.AUDIO_STORAGE_PATH, exist_ok=True)
+    _audio_dir_ready = True
@@ -1,284 +1,729 @@
 import sqlite3
 import json
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from itertools import combinations
+from urllib.parse import quote
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 import logging
 
 logger = logging.getLogger(__name__)
 
+# SQL statements are kept as module constants so the connection's statement
+# cache always sees the exact same text and reuses the compiled statement
+_SQL_INSERT_AUDIO = '''
+    INSERT INTO audio_files (user_id, file_id, filename, file_path,
+                           duration, file_size, format, upload_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_USER_AUDIO = '''
+    SELECT * FROM audio_files WHERE user_id = ? ORDER BY upload_date DESC
+'''
+
+_SQL_SELECT_AUDIO = 'SELECT * FROM audio_files WHERE id = ?'
+
+_SQL_DELETE_AUDIO = '''
+    DELETE FROM audio_files WHERE id = ? AND user_id = ? RETURNING file_path
+'''
+
+_SQL_INSERT_TTS_CONFIG = '''
+    INSERT INTO tts_configs (user_id, text_content, voice_name, language,
+                           speed, pitch, ssml_enabled, ssml_content, created_date)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_TTS_CONFIG = 'SELECT * FROM tts_configs WHERE id = ?'
+
+_SQL_INSERT_CALL_SESSION = '''
+    INSERT INTO call_sessions (user_id, phone_number, call_type,
+                             audio_file_id, tts_config_id, start_time)
+    VALUES (?, ?, ?, ?, ?, ?)
+'''
+
+# Columns update_call_session may change, in parameter order
+_CALL_SESSION_UPDATE_COLUMNS = ('twilio_call_sid', 'status', 'end_time')
+
+# One prebuilt UPDATE per non-empty column subset, keyed by the column tuple
+_SQL_UPDATE_CALL_SESSION = {
+    columns: f"UPDATE call_sessions SET {', '.join(f'{c} = ?' for c in columns)} WHERE id = ?"
+    for n in range(1, len(_CALL_SESSION_UPDATE_COLUMNS) + 1)
+    for columns in combinations(_CALL_SESSION_UPDATE_COLUMNS, n)
+}
+
+_SQL_INSERT_VOICE_RESPONSE = '''
+    INSERT INTO voice_responses (call_session_id, full_transcription,
+                               extracted_numbers, confidence_score, timestamp)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
+_SQL_SELECT_CALL_HISTORY = '''
+    SELECT * FROM v_call_history WHERE user_id = ? ORDER BY start_time DESC LIMIT ?
+'''
+
+_SQL_UPSERT_USER_SESSION = '''
+    INSERT OR REPLACE INTO user_sessions (user_id, session_data, last_updated)
+    VALUES (?, ?, ?)
+'''
+
+_SQL_SELECT_USER_SESSION = '''
+    SELECT session_data FROM user_sessions WHERE user_id = ?
+'''
+
+_SQL_DELETE_USER_SESSION = 'DELETE FROM user_sessions WHERE user_id = ?'
+
+# Only the columns the webhook handlers route on
+_SQL_SELECT_CALL_SESSION = '''
+    SELECT user_id, phone_number, audio_file_id, tts_config_id
+    FROM call_sessions WHERE id = ?
+'''
+
+_SQL_SELECT_CALL_SESSION_BY_SID = '''
+    SELECT * FROM call_sessions WHERE twilio_call_sid = ?
+'''
+
+_SQL_SELECT_META = 'SELECT value FROM meta WHERE key = ?'
+
+_SQL_UPSERT_META = 'INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)'
+
+# Full schema applied in one executescript call at startup; every statement is
+# idempotent and the whole script runs as a single transaction
+_SCHEMA_SQL = '''
+BEGIN;
+
+-- Audio files table
+CREATE TABLE IF NOT EXISTS audio_files (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    file_id TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    duration INTEGER,
+    file_size INTEGER,
+    format TEXT,
+    upload_date INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+-- TTS configurations table
+CREATE TABLE IF NOT EXISTS tts_configs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    text_content TEXT NOT NULL,
+    voice_name TEXT DEFAULT 'alice',
+    language TEXT DEFAULT 'en-US',
+    speed INTEGER DEFAULT 100,
+    pitch INTEGER DEFAULT 0,
+    ssml_enabled BOOLEAN DEFAULT FALSE,
+    ssml_content TEXT,
+    created_date INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+-- Call sessions table
+CREATE TABLE IF NOT EXISTS call_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    phone_number TEXT NOT NULL,
+    audio_file_id INTEGER,
+    tts_config_id INTEGER,
+    call_type TEXT DEFAULT 'audio',
+    twilio_call_sid TEXT,
+    status TEXT DEFAULT 'initiated',
+    start_time INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    end_time INTEGER,
+    FOREIGN KEY (audio_file_id) REFERENCES audio_files (id),
+    FOREIGN KEY (tts_config_id) REFERENCES tts_configs (id)
+);
+
+-- Voice responses table
+CREATE TABLE IF NOT EXISTS voice_responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    call_session_id INTEGER,
+    full_transcription TEXT,
+    extracted_numbers TEXT,
+    confidence_score INTEGER,
+    timestamp INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
+    FOREIGN KEY (call_session_id) REFERENCES call_sessions (id)
+);
+
+-- User sessions table for inline keyboard state
+CREATE TABLE IF NOT EXISTS user_sessions (
+    user_id INTEGER PRIMARY KEY,
+    session_data TEXT,
+    last_updated INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+);
+
+-- Key/value bookkeeping (e.g. when statistics were last gathered)
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+-- Indexes matching the per-user listings and SID lookups
+CREATE INDEX IF NOT EXISTS idx_audio_user_date ON audio_files (user_id, upload_date DESC);
+CREATE INDEX IF NOT EXISTS idx_cs_user_start ON call_sessions (user_id, start_time DESC);
+CREATE INDEX IF NOT EXISTS idx_cs_sid ON call_sessions (twilio_call_sid);
+
+-- Covers the history join, so voice_responses rows are never fetched for it;
+-- its call_session_id prefix replaces the old single-column index
+CREATE INDEX IF NOT EXISTS idx_vr_cover
+ON voice_responses (call_session_id, full_transcription, extracted_numbers);
+DROP INDEX IF EXISTS idx_vr_session;
+
+-- Call history: each session with its spoken response, if any
+CREATE VIEW IF NOT EXISTS v_call_history AS
+SELECT cs.*, vr.full_transcription, vr.extracted_numbers
+FROM call_sessions cs
+LEFT JOIN voice_responses vr ON cs.id = vr.call_session_id;
+
+COMMIT;
+'''
+
+# Statements kept compiled per connection (sqlite3 defaults to 128)
+_CACHED_STATEMENTS = 256
+
+# WAL lets readers proceed while a write is in progress; synchronous=NORMAL
+# is durable in WAL mode and only skips the fsync on each commit
+_WRITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+)
+
+# Per-connection tuning applied to the writer and every pooled reader
+_CONNECTION_PRAGMAS = (
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+)
+
+# Page cache size per connection, in KiB. Only the writer gets a large one;
+# readers already share hot pages through mmap, and a large private cache on
+# each pooled reader would multiply memory use by _READ_POOL_SIZE
+_WRITE_CACHE_KIB = 65536
+_READ_CACHE_KIB = 8192
+
+# Number of read-only connections kept open for SELECTs
+_READ_POOL_SIZE = 8
+
+# Session blobs are encoded compactly (no spaces after separators) with
+# prebuilt encoder/decoder instances; both use the C accelerated _json module
+_encode_session = json.JSONEncoder(separators=(',', ':')).encode
+_decode_session = json.JSONDecoder().decode
+
+# Narrow-range REAL values are stored as scaled INTEGERs; SQLite encodes small
+# integers in 1-2 bytes instead of the 8 bytes a REAL always takes
+SPEED_SCALE = 100
+PITCH_SCALE = 100
+CONFIDENCE_SCALE = 10000
+
+# Bumped whenever existing rows have to be rewritten (PRAGMA user_version)
+SCHEMA_VERSION = 2
+
+# Timestamp columns, all stored as INTEGER unix epoch seconds (UTC)
+_TIMESTAMP_COLUMNS = (
+    ('audio_files', 'upload_date'),
+    ('tts_configs', 'created_date'),
+    ('call_sessions', 'start_time'),
+    ('call_sessions', 'end_time'),
+    ('voice_responses', 'timestamp'),
+    ('user_sessions', 'last_updated'),
+)
+
+def quantize(value: Optional[float], scale: int) -> Optional[int]:
+    """Encode a float as a scaled integer for storage"""
+    return None if value is None else int(round(value * scale))
+
+def dequantize(value: Optional[int], scale: int) -> Optional[float]:
+    """Decode a scaled integer column back to a float"""
+    return None if value is None else value / scale
+
+# Planner statistics older than this many seconds are refreshed at startup
+ANALYZE_INTERVAL = 24 * 60 * 60
+
+# Audio file and TTS config rows never change once written, so rows read by
+# ID are kept in an LRU cache. Keys are (db_path, table, id) and the cache is
+# shared by every Database on the same file, so a delete through one instance
+# is seen by the others
+ROW_CACHE_SIZE = 512
+_row_cache: OrderedDict = OrderedDict()
+_row_cache_lock = threading.Lock()
+
+# Cached sessions are dropped after this many seconds without access
+SESSION_CACHE_TTL = 600
+# Session changes are written to SQLite this many seconds after the first
+# unsaved change, so a burst of button presses becomes a single write
+SESSION_FLUSH_DELAY = 0.2
+
 class Database:
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # Single writer shared by all threads (Flask workers and the bot's
+        # event loop), serialized by a re-entrant lock
+        self._write_conn = self._connect(db_path, cache_kib=_WRITE_CACHE_KIB)
+        self._write_lock = threading.RLock()
         self.init_database()
+        
+        # Read-only connections for SELECTs; in WAL mode they never wait on
+        # the writer, so reads scale with the pool size
+        read_uri = f"file:{quote(os.path.abspath(db_path))}?mode=ro"
+        self._read_pool = queue.Queue(maxsize=_READ_POOL_SIZE)
+        for _ in range(_READ_POOL_SIZE):
+            self._read_pool.put(self._connect(read_uri, uri=True, cache_kib=_READ_CACHE_KIB))
+        
+        # Write-back cache of encoded sessions: user_id -> (payload, expires_at),
+        # where a None payload means "no session"
+        self._session_cache: Dict[int, tuple] = {}
+        self._session_dirty = set()
+        self._session_lock = threading.Lock()
+        self._session_flush_timer = None
+        self._closed = False
+    
+    @staticmethod
+    def _connect(database: str, cache_kib: int, uri: bool = False) -> sqlite3.Connection:
+        """Open a tuned connection usable from any thread"""
+        conn = sqlite3.connect(
+            database,
+            uri=uri,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=_CACHED_STATEMENTS
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in _CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        conn.execute(f'PRAGMA cache_size=-{int(cache_kib)}')
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """Hold the writer for an explicit BEGIN ... COMMIT block"""
+        with self._write_lock:
+            self._write_conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._write_conn
+            except BaseException:
+                self._write_conn.execute('ROLLBACK')
+                raise
+            self._write_conn.execute('COMMIT')
+    
+    @contextmanager
+    def _read(self):
+        """Borrow a read-only connection from the pool"""
+        conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
     
     def init_database(self):
         """Initialize database with required tables"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
+            with self._write_lock:
+                cursor = self._write_conn.cursor()
                 
-                # Audio files table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS audio_files (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        file_id TEXT NOT NULL,
-                        filename TEXT NOT NULL,
-                        file_path TEXT NOT NULL,
-                        duration INTEGER,
-                        file_size INTEGER,
-                        format TEXT,
-                        upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                # Journal settings (WAL mode is persisted in the database file)
+                for pragma in _WRITE_PRAGMAS:
+                    cursor.execute(pragma)
                 
-                # TTS configurations table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS tts_configs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        text_content TEXT NOT NULL,
-                        voice_name TEXT DEFAULT 'alice',
-                        language TEXT DEFAULT 'en-US',
-                        speed REAL DEFAULT 1.0,
-                        pitch REAL DEFAULT 0.0,
-                        ssml_enabled BOOLEAN DEFAULT FALSE,
-                        ssml_content TEXT,
-                        created_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                # Tables and indexes in one round trip
+                try:
+                    self._write_conn.executescript(_SCHEMA_SQL)
+                except Exception:
+                    if self._write_conn.in_transaction:
+                        self._write_conn.execute('ROLLBACK')
+                    raise
                 
-                # Call sessions table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS call_sessions (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id INTEGER NOT NULL,
-                        phone_number TEXT NOT NULL,
-                        audio_file_id INTEGER,
-                        tts_config_id INTEGER,
-                        call_type TEXT DEFAULT 'audio',
-                        twilio_call_sid TEXT,
-                        status TEXT DEFAULT 'initiated',
-                        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        end_time TIMESTAMP,
-                        FOREIGN KEY (audio_file_id) REFERENCES audio_files (id),
-                        FOREIGN KEY (tts_config_id) REFERENCES tts_configs (id)
-                    )
-                ''')
+                self._migrate()
                 
-                # Voice responses table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS voice_responses (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        call_session_id INTEGER,
-                        full_transcription TEXT,
-                        extracted_numbers TEXT,
-                        confidence_score REAL,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (call_session_id) REFERENCES call_sessions (id)
-                    )
-                ''')
+                # Refresh planner statistics off the startup path when stale
+                row = cursor.execute(_SQL_SELECT_META, ('last_analyze',)).fetchone()
+                if row is None or time.time() - float(row[0]) > ANALYZE_INTERVAL:
+                    threading.Thread(target=self._analyze, daemon=True).start()
                 
-                # User sessions table for inline keyboard state
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS user_sessions (
-                        user_id INTEGER PRIMARY KEY,
-                        session_data TEXT,
-                        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                conn.commit()
                 logger.info("Database initialized successfully")
-                
+        
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
             raise
     
-    def save_audio_file(self, user_id: int, file_id: str, filename: str, 
-                       file_path: str, duration: int = None, file_size: int = None, 
+    def _migrate(self):
+        """Bring rows written by older versions up to SCHEMA_VERSION"""
+        version = self._write_conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        with self._transaction() as conn:
+            if version < 1:
+                # v1: speed/pitch/confidence_score were stored as plain REALs
+                conn.execute(f'''
+                    UPDATE tts_configs
+                    SET speed = CAST(ROUND(speed * {SPEED_SCALE}) AS INTEGER),
+                        pitch = CAST(ROUND(pitch * {PITCH_SCALE}) AS INTEGER)
+                ''')
+                conn.execute(f'''
+                    UPDATE voice_responses
+                    SET confidence_score = CAST(ROUND(confidence_score * {CONFIDENCE_SCALE}) AS INTEGER)
+                ''')
+            if version < 2:
+                # v2: timestamps were stored as CURRENT_TIMESTAMP text
+                for table, column in _TIMESTAMP_COLUMNS:
+                    conn.execute(f'''
+                        UPDATE {table}
+                        SET {column} = CAST(strftime('%s', {column}) AS INTEGER)
+                        WHERE typeof({column}) = 'text'
+                    ''')
+            conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        logger.info(f"Database migrated from version {version} to {SCHEMA_VERSION}")
+    
+    def _analyze(self):
+        """Gather planner statistics and record when it was done"""
+        try:
+            with self._write_lock:
+                self._write_conn.execute('ANALYZE')
+                self._write_conn.execute(_SQL_UPSERT_META, ('last_analyze', str(time.time())))
+            logger.info("Database statistics refreshed")
+        except Exception as e:
+            logger.error(f"Error analyzing database: {e}")
+    
+    def close(self):
+        """Flush pending session writes, optimize and close all connections"""
+        with self._session_lock:
+            timer = self._session_flush_timer
+        if timer is not None:
+            timer.cancel()
+        self._flush_sessions()
+        
+        # No flush may be scheduled once the connections are gone
+        with self._session_lock:
+            self._closed = True
+            timer = self._session_flush_timer
+            self._session_flush_timer = None
+            if self._session_dirty:
+                logger.error(f"Unsaved sessions lost at close: {sorted(self._session_dirty)}")
+        if timer is not None:
+            timer.cancel()
+        
+        with self._write_lock:
+            try:
+                # Lets SQLite re-analyze tables whose statistics have drifted
+                self._write_conn.execute('PRAGMA optimize')
+            except Exception as e:
+                logger.error(f"Error optimizing database: {e}")
+            self._write_conn.close()
+        
+        while not self._read_pool.empty():
+            self._read_pool.get_nowait().close()
+    
+    def save_audio_file(self, user_id: int, file_id: str, filename: str,
+                       file_path: str, duration: int = None, file_size: int = None,
                        format: str = None) -> int:
         """Save audio file information"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO audio_files (user_id, file_id, filename, file_path, 
-                                           duration, file_size, format)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, file_id, filename, file_path, duration, file_size, format))
+            with self._write_lock:
+                cursor = self._write_conn.execute(
+                    _SQL_INSERT_AUDIO,
+                    (user_id, file_id, filename, file_path, duration, file_size, format,
+                     int(time.time()))
+                )
                 return cursor.lastrowid
         except Exception as e:
             logger.error(f"Error saving audio file: {e}")
             raise
     
-    def get_user_audio_files(self, user_id: int) -> List[Dict]:
-        """Get all audio files for a user"""
+    def get_user_audio_rows(self, user_id: int) -> List[sqlite3.Row]:
+        """Get a user's audio files as rows, newest first, without dict copies"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM audio_files WHERE user_id = ? ORDER BY upload_date DESC
-                ''', (user_id,))
-                return [dict(row) for row in cursor.fetchall()]
+            # Fetched before the connection goes back to the pool, so no
+            # caller can hold a reader by keeping a cursor open
+            with self._read() as conn:
+                return conn.execute(_SQL_SELECT_USER_AUDIO, (user_id,)).fetchall()
         except Exception as e:
             logger.error(f"Error getting audio files: {e}")
             return []
     
-    def delete_audio_file(self, user_id: int, audio_id: int) -> bool:
-        """Delete audio file record"""
+    def get_user_audio_files(self, user_id: int) -> List[Dict]:
+        """Get all audio files for a user"""
+        return [dict(row) for row in self.get_user_audio_rows(user_id)]
+    
+    def delete_audio_file(self, user_id: int, audio_id: int) -> Optional[str]:
+        """Delete audio file record; returns its file path, or None if nothing was deleted"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    DELETE FROM audio_files WHERE id = ? AND user_id = ?
-                ''', (audio_id, user_id))
-                return cursor.rowcount > 0
+            with self._write_lock:
+                # fetchall steps the statement to completion so the delete commits
+                rows = self._write_conn.execute(_SQL_DELETE_AUDIO, (audio_id, user_id)).fetchall()
+            if not rows:
+                return None
+            with _row_cache_lock:
+                _row_cache.pop((self.db_path, 'audio_files', audio_id), None)
+            return rows[0][0]
         except Exception as e:
             logger.error(f"Error deleting audio file: {e}")
-            return False
+            return None
+    
+    def get_audio_file(self, audio_id: int) -> Optional[Dict]:
+        """Get an audio file record by ID"""
+        try:
+            row = self._get_row_by_id('audio_files', _SQL_SELECT_AUDIO, audio_id)
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting audio file: {e}")
+            return None
+    
+    def get_tts_config(self, config_id: int) -> Optional[Dict]:
+        """Get a TTS configuration record by ID"""
+        try:
+            row = self._get_row_by_id('tts_configs', _SQL_SELECT_TTS_CONFIG, config_id)
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Error getting TTS config: {e}")
+            return None
+    
+    def _get_row_by_id(self, table: str, sql: str, row_id: int) -> Optional[sqlite3.Row]:
+        """Read a write-once row through the shared row cache"""
+        key = (self.db_path, table, row_id)
+        with _row_cache_lock:
+            row = _row_cache.get(key)
+            if row is not None:
+                _row_cache.move_to_end(key)
+                return row
+        
+        with self._read() as conn:
+            row = conn.execute(sql, (row_id,)).fetchone()
+        # Misses aren't cached; the row may be inserted later
+        if row is not None:
+            with _row_cache_lock:
+                _row_cache[key] = row
+                if len(_row_cache) > ROW_CACHE_SIZE:
+                    _row_cache.popitem(last=False)
+        return row
     
     def save_tts_config(self, user_id: int, text_content: str, config: Dict) -> int:
         """Save TTS configuration"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO tts_configs (user_id, text_content, voice_name, language,
-                                           speed, pitch, ssml_enabled, ssml_content)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+            with self._write_lock:
+                cursor = self._write_conn.execute(_SQL_INSERT_TTS_CONFIG, (
                     user_id, text_content, config.get('voice_name', 'alice'),
-                    config.get('language', 'en-US'), config.get('speed', 1.0),
-                    config.get('pitch', 0.0), config.get('ssml_enabled', False),
-                    json.dumps(config.get('ssml_options', {}))
+                    config.get('language', 'en-US'),
+                    quantize(config.get('speed', 1.0), SPEED_SCALE),
+                    quantize(config.get('pitch', 0.0), PITCH_SCALE),
+                    config.get('ssml_enabled', False),
+                    json.dumps(config.get('ssml_options', {})), int(time.time())
                 ))
                 return cursor.lastrowid
         except Exception as e:
             logger.error(f"Error saving TTS config: {e}")
             raise
     
-    def create_call_session(self, user_id: int, phone_number: str, 
+    def create_call_session(self, user_id: int, phone_number: str,
                            call_type: str = 'audio', audio_file_id: int = None,
                            tts_config_id: int = None) -> int:
         """Create new call session"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO call_sessions (user_id, phone_number, call_type,
-                                             audio_file_id, tts_config_id)
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (user_id, phone_number, call_type, audio_file_id, tts_config_id))
+            with self._write_lock:
+                cursor = self._write_conn.execute(
+                    _SQL_INSERT_CALL_SESSION,
+                    (user_id, phone_number, call_type, audio_file_id, tts_config_id,
+                     int(time.time()))
+                )
                 return cursor.lastrowid
         except Exception as e:
             logger.error(f"Error creating call session: {e}")
             raise
     
-    def update_call_session(self, session_id: int, **kwargs):
+    def update_call_session(self, session_id: int, **kwargs) -> bool:
         """Update call session with new data"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                set_clauses = []
-                values = []
-                
-                for key, value in kwargs.items():
-                    if key in ['twilio_call_sid', 'status', 'end_time']:
-                        set_clauses.append(f"{key} = ?")
-                        values.append(value)
-                
-                if set_clauses:
-                    values.append(session_id)
-                    cursor.execute(f'''
-                        UPDATE call_sessions SET {', '.join(set_clauses)}
-                        WHERE id = ?
-                    ''', values)
+            columns = tuple(c for c in _CALL_SESSION_UPDATE_COLUMNS if c in kwargs)
+            
+            if columns:
+                values = [kwargs[c] for c in columns]
+                values.append(session_id)
+                with self._write_lock:
+                    self._write_conn.execute(_SQL_UPDATE_CALL_SESSION[columns], values)
+            return True
         except Exception as e:
             logger.error(f"Error updating call session: {e}")
+            return False
     
     def save_voice_response(self, call_session_id: int, transcription: str,
                            extracted_numbers: str, confidence_score: float = None):
         """Save voice response data"""
+        self.save_voice_responses_bulk(
+            [(call_session_id, transcription, extracted_numbers, confidence_score)]
+        )
+    
+    def save_voice_responses_bulk(self, rows: List[tuple]):
+        """Save many voice responses in one transaction (one commit for all rows)"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT INTO voice_responses (call_session_id, full_transcription,
-                                               extracted_numbers, confidence_score)
-                    VALUES (?, ?, ?, ?)
-                ''', (call_session_id, transcription, extracted_numbers, confidence_score))
+            now = int(time.time())
+            rows = [
+                (call_session_id, transcription, extracted_numbers,
+                 quantize(confidence_score, CONFIDENCE_SCALE), now)
+                for call_session_id, transcription, extracted_numbers, confidence_score in rows
+            ]
+            with self._transaction() as conn:
+                conn.executemany(_SQL_INSERT_VOICE_RESPONSE, rows)
         except Exception as e:
-            logger.error(f"Error saving voice response: {e}")
+            logger.error(f"Error saving voice responses: {e}")
     
-    def get_call_history(self, user_id: int, limit: int = 20) -> List[Dict]:
-        """Get call history for user"""
+    def save_call_results_bulk(self, rows: List[tuple]) -> bool:
+        """Save voice responses and mark their call sessions completed, in one transaction;
+        returns False if nothing was written"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT cs.*, vr.full_transcription, vr.extracted_numbers
-                    FROM call_sessions cs
-                    LEFT JOIN voice_responses vr ON cs.id = vr.call_session_id
-                    WHERE cs.user_id = ?
-                    ORDER BY cs.start_time DESC
-                    LIMIT ?
-                ''', (user_id, limit))
-                return [dict(row) for row in cursor.fetchall()]
+            responses = []
+            completions = []
+            for call_session_id, transcription, extracted_numbers, confidence_score, end_time in rows:
+                responses.append((call_session_id, transcription, extracted_numbers,
+                                  quantize(confidence_score, CONFIDENCE_SCALE), end_time))
+                completions.append(('completed', end_time, call_session_id))
+            with self._transaction() as conn:
+                conn.executemany(_SQL_INSERT_VOICE_RESPONSE, responses)
+                conn.executemany(_SQL_UPDATE_CALL_SESSION[('status', 'end_time')], completions)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving call results: {e}")
+            return False
+    
+    def get_call_history_rows(self, user_id: int, limit: int = 20) -> List[sqlite3.Row]:
+        """Get call history for user as rows, without dict copies"""
+        try:
+            with self._read() as conn:
+                return conn.execute(_SQL_SELECT_CALL_HISTORY, (user_id, limit)).fetchall()
         except Exception as e:
             logger.error(f"Error getting call history: {e}")
             return []
     
+    def get_call_history(self, user_id: int, limit: int = 20) -> List[Dict]:
+        """Get call history for user"""
+        return [dict(row) for row in self.get_call_history_rows(user_id, limit)]
+    
     def save_user_session(self, user_id: int, session_data: Dict):
         """Save user session data for inline keyboards"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO user_sessions (user_id, session_data, last_updated)
-                    VALUES (?, ?, CURRENT_TIMESTAMP)
-                ''', (user_id, json.dumps(session_data)))
+            self._cache_session(user_id, _encode_session(session_data))
         except Exception as e:
             logger.error(f"Error saving user session: {e}")
     
     def get_user_session(self, user_id: int) -> Dict:
         """Get user session data"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT session_data FROM user_sessions WHERE user_id = ?
-                ''', (user_id,))
-                result = cursor.fetchone()
-                if result:
-                    return json.loads(result[0])
-                return {}
+            session = self.get_cached_user_session(user_id)
+            if session is not None:
+                return session
+            
+            now = time.monotonic()
+            with self._read() as conn:
+                result = conn.execute(_SQL_SELECT_USER_SESSION, (user_id,)).fetchone()
+            # Keep a newer value saved while we were reading
+            with self._session_lock:
+                payload = self._session_cache.setdefault(
+                    user_id, (result[0] if result else None, now + SESSION_CACHE_TTL)
+                )[0]
+            
+            if payload:
+                return _decode_session(payload)
+            return {}
         except Exception as e:
             logger.error(f"Error getting user session: {e}")
             return {}
     
+    def get_cached_user_session(self, user_id: int) -> Optional[Dict]:
+        """Get user session data from the cache only; None if it isn't cached"""
+        now = time.monotonic()
+        with self._session_lock:
+            entry = self._session_cache.get(user_id)
+            if entry is None:
+                return None
+            if entry[1] <= now and user_id not in self._session_dirty:
+                del self._session_cache[user_id]
+                return None
+            self._session_cache[user_id] = (entry[0], now + SESSION_CACHE_TTL)
+        
+        if entry[0]:
+            return _decode_session(entry[0])
+        return {}
+    
     def clear_user_session(self, user_id: int):
         """Clear user session data"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute('DELETE FROM user_sessions WHERE user_id = ?', (user_id,))
+            self._cache_session(user_id, None)
         except Exception as e:
             logger.error(f"Error clearing user session: {e}")
-
+    
+    def _cache_session(self, user_id: int, payload: Optional[str]):
+        """Update the session cache and schedule the deferred database write"""
+        with self._session_lock:
+            self._session_cache[user_id] = (payload, time.monotonic() + SESSION_CACHE_TTL)
+            self._session_dirty.add(user_id)
+            self._schedule_session_flush()
+    
+    def _schedule_session_flush(self):
+        """Start the flush timer if none is pending; caller holds _session_lock"""
+        if self._session_flush_timer is None and not self._closed:
+            self._session_flush_timer = threading.Timer(
+                SESSION_FLUSH_DELAY, self._flush_sessions
+            )
+            self._session_flush_timer.daemon = True
+            self._session_flush_timer.start()
+    
+    def _flush_sessions(self):
+        """Write changed sessions to the database and evict expired entries"""
+        # Holding the writer while taking the snapshot keeps flushes in order
+        with self._write_lock:
+            now = time.monotonic()
+            with self._session_lock:
+                # Sessions stay dirty until the write commits; dirty entries
+                # are never evicted, so a failed write can be retried
+                changed = [(user_id, self._session_cache[user_id][0])
+                           for user_id in self._session_dirty]
+                self._session_flush_timer = None
+                for user_id in [user_id for user_id, (_, expires_at)
+                                in self._session_cache.items()
+                                if expires_at <= now and user_id not in self._session_dirty]:
+                    del self._session_cache[user_id]
+            
+            saved_at = int(time.time())
+            try:
+                with self._transaction() as conn:
+                    conn.executemany(_SQL_UPSERT_USER_SESSION, [
+                        (user_id, payload, saved_at) for user_id, payload in changed if payload
+                    ])
+                    conn.executemany(_SQL_DELETE_USER_SESSION, [
+                        (user_id,) for user_id, payload in changed if not payload
+                    ])
+            except Exception as e:
+                logger.error(f"Error writing user sessions: {e}")
+                with self._session_lock:
+                    self._schedule_session_flush()
+                return
+            
+            with self._session_lock:
+                for user_id, payload in changed:
+                    # A session changed again since the snapshot stays dirty
+                    if self._session_cache.get(user_id, (None,))[0] is payload:
+                        self._session_dirty.discard(user_id)
+    
+    def get_call_session(self, session_id: int) -> Optional[Dict]:
+        """Get a call session's user, phone number, audio file and TTS config by ID"""
+        try:
+            with self._read() as conn:
+                result = conn.execute(_SQL_SELECT_CALL_SESSION, (session_id,)).fetchone()
+            return dict(result) if result else None
+        except Exception as e:
+            logger.error(f"Error getting call session: {e}")
+            return None
+    
     def get_call_session_by_sid(self, call_sid: str) -> Optional[Dict]:
         """Get call session by Twilio call SID"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('''
-                    SELECT * FROM call_sessions WHERE twilio_call_sid = ?
-                ''', (call_sid,))
-                result = cursor.fetchone()
-                return dict(result) if result else None
+            with self._read() as conn:
+                result = conn.execute(
+                    _SQL_SELECT_CALL_SESSION_BY_SID, (call_sid,)
+                ).fetchone()
+            return dict(result) if result else None
         except Exception as e:
             logger.error(f"Error getting call session by SID: {e}")
             return None
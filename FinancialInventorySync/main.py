@@ -5,31 +5,57 @@ Main entry point that runs both Telegram bot and webhook server
 """
 
 import asyncio
-import threading
+import atexit
 import logging
+import queue
 import signal
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from telegram_bot import TelegramBot
-from webhook_server import run_webhook_server
+from webhook_server import WebhookServer
 from config import Config, get_webhook_url
 
-# Configure logging
+# Configure logging; bot.log is written by a listener thread so log calls on
+# the event loop only enqueue the (already formatted) record
+_log_queue = queue.SimpleQueue()
+_log_listener = QueueListener(_log_queue, logging.FileHandler('bot.log'))
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
+# force=True replaces the stderr handler the imported modules' basicConfig
+# calls already installed on the root logger
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[
         logging.StreamHandler(sys.stdout),
-        logging.FileHandler('bot.log')
-    ]
+        QueueHandler(_log_queue)
+    ],
+    force=True
 )
 logger = logging.getLogger(__name__)
 
+# Startup banner, encoded once so it goes out in a single write
+_BANNER = """
+    ╔═══════════════════════════════════════════════════════════════╗
+    ║                 🤖 TELEGRAM CALLING BOT 📞                   ║
+    ║                                                               ║
+    ║  Advanced bot for making phone calls with TTS and audio      ║
+    ║  • Upload audio files or use text-to-speech                  ║
+    ║  • Make calls and capture spoken responses                   ║
+    ║  • Intelligent number extraction from speech                 ║
+    ║  • Full inline keyboard configuration                        ║
+    ║                                                               ║
+    ║  🚀 Starting up...                                           ║
+    ╚═══════════════════════════════════════════════════════════════╝
+    """.encode() + b"\n"
+
 class BotManager:
     """Manages both Telegram bot and webhook server"""
     
     def __init__(self):
         self.telegram_bot = None
-        self.webhook_thread = None
+        self.webhook_task = None
         self.running = False
     
     async def start(self):
@@ -45,17 +71,12 @@ class BotManager:
             # Create Telegram bot
             self.telegram_bot = TelegramBot()
             
-            # Start webhook server in separate thread
+            # Bind the webhook port before anything runs, so a port that's in
+            # use fails startup; serving then runs as a task on this loop
             logger.info(f"🌐 Starting webhook server on port {Config.WEBHOOK_PORT}")
-            self.webhook_thread = threading.Thread(
-                target=run_webhook_server,
-                args=(self.telegram_bot,),
-                daemon=True
-            )
-            self.webhook_thread.start()
-            
-            # Wait a moment for webhook server to start
-            await asyncio.sleep(2)
+            webhook_server = WebhookServer(self.telegram_bot)
+            webhook_server.bind()
+            self.webhook_task = asyncio.create_task(webhook_server.serve())
             
             # Start Telegram bot
             logger.info("🤖 Starting Telegram bot...")
@@ -67,6 +88,7 @@ class BotManager:
             
             # Run bot
             await self.telegram_bot.run()
+            return True
             
         except Exception as e:
             logger.error(f"❌ Error starting bot: {e}")
@@ -74,32 +96,25 @@ class BotManager:
     
     def _validate_config(self) -> bool:
         """Validate required configuration"""
-        # Check Telegram token (required)
-        if not Config.TELEGRAM_BOT_TOKEN or Config.TELEGRAM_BOT_TOKEN.startswith('your_'):
-            logger.error("❌ Missing TELEGRAM_BOT_TOKEN")
+        # The checks themselves run once when config is imported
+        if Config.VALIDATION_ERRORS:
+            logger.error("\n".join(Config.VALIDATION_ERRORS))
             return False
         
-        # Check Twilio credentials (optional for testing)
-        twilio_vars = [
-            ('TWILIO_ACCOUNT_SID', Config.TWILIO_ACCOUNT_SID),
-            ('TWILIO_AUTH_TOKEN', Config.TWILIO_AUTH_TOKEN),
-            ('TWILIO_PHONE_NUMBER', Config.TWILIO_PHONE_NUMBER)
-        ]
-        
-        missing_twilio = []
-        for var_name, var_value in twilio_vars:
-            if not var_value or var_value.startswith('your_'):
-                missing_twilio.append(var_name)
-        
-        if missing_twilio:
-            logger.warning(f"⚠️  Twilio credentials missing: {', '.join(missing_twilio)}")
-            logger.warning("🔧 Bot will run in limited mode (no calling functionality)")
-            logger.warning("💡 Add Twilio credentials later to enable phone calls")
+        if Config.MISSING_TWILIO_VARS:
+            lines = [
+                f"⚠️  Twilio credentials missing: {', '.join(Config.MISSING_TWILIO_VARS)}",
+                "🔧 Bot will run in limited mode (no calling functionality)",
+                "💡 Add Twilio credentials later to enable phone calls",
+            ]
         else:
-            logger.info(f"📞 Twilio Number: {Config.TWILIO_PHONE_NUMBER}")
+            lines = [f"📞 Twilio Number: {Config.TWILIO_PHONE_NUMBER}"]
+        lines.append("✅ Telegram bot configuration validated")
+        lines.append(f"🌐 Webhook URL: {get_webhook_url()}")
         
-        logger.info("✅ Telegram bot configuration validated")
-        logger.info(f"🌐 Webhook URL: {get_webhook_url()}")
+        # One record for the whole report; a warning when calling is disabled
+        level = logging.WARNING if Config.MISSING_TWILIO_VARS else logging.INFO
+        logger.log(level, "\n".join(lines))
         
         return True
     
@@ -107,13 +122,27 @@ class BotManager:
         """Handle shutdown signals"""
         logger.info(f"📡 Received signal {signum}, shutting down...")
         self.running = False
-        sys.exit(0)
+        if self.telegram_bot:
+            # Let the bot's run() return and shut down cleanly
+            self.telegram_bot.request_stop()
+        else:
+            sys.exit(0)
     
     async def stop(self):
         """Stop bot and webhook server"""
         logger.info("🛑 Stopping bot...")
         self.running = False
         
+        if self.webhook_task:
+            self.webhook_task.cancel()
+            # Wait for the server to shut down and save queued call results
+            try:
+                await self.webhook_task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                logger.error(f"❌ Error stopping webhook server: {e}")
+        
         if self.telegram_bot:
             # Bot shutdown is handled in telegram_bot.py
             pass
@@ -123,7 +152,8 @@ async def main():
     bot_manager = BotManager()
     
     try:
-        await bot_manager.start()
+        if not await bot_manager.start():
+            sys.exit(1)
     except KeyboardInterrupt:
         logger.info("👋 Bot stopped by user")
     except Exception as e:
@@ -133,20 +163,11 @@ async def main():
         await bot_manager.stop()
 
 if __name__ == "__main__":
-    # Print startup banner
-    print("""
-    ╔═══════════════════════════════════════════════════════════════╗
-    ║                 🤖 TELEGRAM CALLING BOT 📞                   ║
-    ║                                                               ║
-    ║  Advanced bot for making phone calls with TTS and audio      ║
-    ║  • Upload audio files or use text-to-speech                  ║
-    ║  • Make calls and capture spoken responses                   ║
-    ║  • Intelligent number extraction from speech                 ║
-    ║  • Full inline keyboard configuration                        ║
-    ║                                                               ║
-    ║  🚀 Starting up...                                           ║
-    ╚═══════════════════════════════════════════════════════════════╝
-    """)
+    # Startup banner goes to terminals only; under systemd/docker stdout is
+    # a file or pipe and the log lines already record the startup
+    if sys.stdout.isatty():
+        sys.stdout.buffer.write(_BANNER)
+        sys.stdout.buffer.flush()
     
     try:
         asyncio.run(main())
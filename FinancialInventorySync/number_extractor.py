@@ -1,37 +1,137 @@
 import re
 import logging
-from typing import List, Tuple
-from word2number import w2n
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Iterable, List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Number of distinct transcriptions whose extraction results are kept
+EXTRACTION_CACHE_SIZE = 1024
+
+# ASCII cleanup in one str.translate pass: uppercase to lowercase, and anything
+# _clean_text's punctuation regex would remove (not word, space or dash) to a space
+_ASCII_CLEAN_TABLE = {
+    code: chr(code).lower() if re.match(r'[\w\s\-]', chr(code)) else ' '
+    for code in range(128)
+}
+
+class _DigitsOnly(dict):
+    """str.translate table that deletes everything except decimal digits"""
+    def __missing__(self, code):
+        # Same characters as the regex \d; each code point is classified once
+        value = code if chr(code).isdecimal() else None
+        self[code] = value
+        return value
+
+_DIGITS_ONLY = _DigitsOnly()
+
+# Word-to-number mapping including common variations
+_WORD_TO_NUM = MappingProxyType({
+    'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
+    'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
+    'oh': '0', 'o': '0',  # Common ways to say zero
+    'ten': '10', 'eleven': '11', 'twelve': '12', 'thirteen': '13',
+    'fourteen': '14', 'fifteen': '15', 'sixteen': '16', 'seventeen': '17',
+    'eighteen': '18', 'nineteen': '19', 'twenty': '20', 'thirty': '30',
+    'forty': '40', 'fifty': '50', 'sixty': '60', 'seventy': '70',
+    'eighty': '80', 'ninety': '90', 'hundred': '100', 'thousand': '1000'
+})
+
+# Common filler words to ignore
+_FILLER = frozenset({
+    'um', 'uh', 'er', 'ah', 'like', 'you', 'know', 'well', 'so',
+    'and', 'the', 'is', 'it', 'my', 'its', 'that', 'this', 'yes',
+    'okay', 'alright', 'sure', 'hello', 'hi', 'speaking'
+})
+
+# Context keywords that often precede numbers
+_CONTEXT_KEYWORDS = (
+    'pin', 'password', 'code', 'number', 'id', 'verification',
+    'security', 'access', 'account', 'phone', 'social', 'zip',
+    'postal', 'credit', 'card', 'ssn', 'license', 'passport'
+)
+
+# Number words that stand for digits on their own (scale words excluded)
+_NUMBER_WORDS = frozenset(_WORD_TO_NUM) - {'hundred', 'thousand'}
+_SPOKEN_DIGITS = {word: _WORD_TO_NUM[word] for word in _NUMBER_WORDS}
+# Integer values for evaluating compound expressions ("five hundred twenty")
+_WORD_VALUES = MappingProxyType({word: int(value) for word, value in _WORD_TO_NUM.items()})
+
+# Regexes are compiled once at import and shared by every extractor
+_PUNCT_RE = re.compile(r'[^\w\s\-]')
+_WHITESPACE_RE = re.compile(r'\s+')
+_DIGIT_RE = re.compile(r'\d')
+
+# Any run of 3+ digits where single spaces or dashes may separate the
+# digits; covers plain, 8-digit, 4+4, paired and digit-by-digit forms. Its
+# space-separated groups of 3+ digits are reported too (see
+# _extract_direct_digits)
+_DIRECT_RE = re.compile(r'\d(?:[-\s]?\d){2,}')
+
+# One pattern for every keyword: "pin is 1234", "code number 5678" or
+# "password one two three four" (spoken digits, 10+ characters)
+_CONTEXT_RE = re.compile(
+    r'(?:{})\s+(?:is|number|code)?\s*(\d{{3,}}|[a-z\s]{{10,}})'.format(
+        '|'.join(map(re.escape, _CONTEXT_KEYWORDS))
+    ),
+    re.IGNORECASE
+)
+
+# Runs of two or more whole number-word tokens; longest words first so
+# e.g. "one" is never cut short to "o"
+_NUMBER_WORD = '(?:{})(?!\\S)'.format(
+    '|'.join(map(re.escape, sorted(_WORD_TO_NUM, key=len, reverse=True)))
+)
+_NUMBER_RUN_RE = re.compile(rf'(?<!\S){_NUMBER_WORD}(?:\s+{_NUMBER_WORD})+')
+
+# Well-known formats, keyed by use case so an extractor can compile only the
+# ones its deployment needs
+_PATTERN_USE_CASES = MappingProxyType({
+    'phone': r'(?:call|phone|dial)\s+(\d{10,})',
+    'zip': r'(?:zip|postal)\s+(?:code)?\s*(\d{5})',
+    'ssn': r'(?:ssn|social)\s+(?:security)?\s*(\d{3}[-\s]?\d{2}[-\s]?\d{4})',
+    'credit_card': r'(\d{4}[-\s]\d{4}[-\s]\d{4}[-\s]\d{4})',
+    'account': r'(?:account|member)\s+(?:number)?\s*(\d{6,})',
+})
+_ADVANCED_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in _PATTERN_USE_CASES.values())
+
 class NumberExtractor:
-    def __init__(self):
-        # Word-to-number mapping including common variations
-        self.word_to_number = {
-            'zero': '0', 'one': '1', 'two': '2', 'three': '3', 'four': '4',
-            'five': '5', 'six': '6', 'seven': '7', 'eight': '8', 'nine': '9',
-            'oh': '0', 'o': '0',  # Common ways to say zero
-            'ten': '10', 'eleven': '11', 'twelve': '12', 'thirteen': '13',
-            'fourteen': '14', 'fifteen': '15', 'sixteen': '16', 'seventeen': '17',
-            'eighteen': '18', 'nineteen': '19', 'twenty': '20', 'thirty': '30',
-            'forty': '40', 'fifty': '50', 'sixty': '60', 'seventy': '70',
-            'eighty': '80', 'ninety': '90', 'hundred': '100', 'thousand': '1000'
-        }
-        
-        # Common filler words to ignore
-        self.filler_words = {
-            'um', 'uh', 'er', 'ah', 'like', 'you', 'know', 'well', 'so',
-            'and', 'the', 'is', 'it', 'my', 'its', 'that', 'this', 'yes',
-            'okay', 'alright', 'sure', 'hello', 'hi', 'speaking'
-        }
-        
-        # Context keywords that often precede numbers
-        self.context_keywords = [
-            'pin', 'password', 'code', 'number', 'id', 'verification',
-            'security', 'access', 'account', 'phone', 'social', 'zip',
-            'postal', 'credit', 'card', 'ssn', 'license', 'passport'
-        ]
+    # Shared read-only vocabularies (see the module constants)
+    word_to_number = _WORD_TO_NUM
+    filler_words = _FILLER
+    context_keywords = _CONTEXT_KEYWORDS
+    
+    def __init__(self, use_cases: Optional[Iterable[str]] = None,
+                 exhaustive_extraction: bool = False):
+        # exhaustive_extraction runs every extraction method, even when a long
+        # direct digit run already settles the result. It is fixed per
+        # instance because cached results depend on it
+        self._exhaustive_extraction = bool(exhaustive_extraction)
+        
+        # Only the format patterns for the requested use cases are scanned;
+        # None keeps every pattern
+        if use_cases is None:
+            self.use_cases = None
+            self._advanced_patterns = _ADVANCED_PATTERNS
+        else:
+            self.use_cases = frozenset(use_cases)
+            unknown = self.use_cases - _PATTERN_USE_CASES.keys()
+            if unknown:
+                raise ValueError(f"Unknown use cases: {', '.join(sorted(unknown))}")
+            self._advanced_patterns = tuple(
+                re.compile(pattern, re.IGNORECASE)
+                for name, pattern in _PATTERN_USE_CASES.items() if name in self.use_cases
+            )
+        
+        # Repeated transcriptions (retries, duplicate webhook deliveries) are
+        # answered from here without running the extraction again
+        self._extract_cached = lru_cache(maxsize=EXTRACTION_CACHE_SIZE)(self._extract_numbers)
+    
+    @property
+    def exhaustive_extraction(self) -> bool:
+        """Whether every extraction method always runs"""
+        return self._exhaustive_extraction
     
     def extract_numbers_from_speech(self, transcription: str) -> Tuple[List[str], float]:
         """
@@ -41,205 +141,197 @@ class NumberExtractor:
         if not transcription:
             return [], 0.0
         
-        logger.info(f"Processing transcription: {transcription}")
+        numbers, confidence = self._extract_cached(transcription)
+        return list(numbers), confidence
+    
+    def _extract_numbers(self, transcription: str) -> Tuple[Tuple[str, ...], float]:
+        """Uncached extraction; returns a tuple so cached results stay immutable"""
+        # Raw input is developer-facing; %-style args are only formatted when a
+        # handler actually emits the record
+        logger.debug("Processing transcription: %s", transcription)
         
         # Clean and normalize text
         text = self._clean_text(transcription)
         
-        # Try multiple extraction methods
-        extracted_numbers = []
+        # Try multiple extraction methods; results go straight into a set so
+        # numbers found by several methods are only stored once
+        extracted_numbers = set()
         confidence_scores = []
         
+        # Literal prefilter: the direct and advanced patterns all need a digit,
+        # so one short search lets fully spoken transcriptions skip them
+        has_digits = _DIGIT_RE.search(text) is not None
+        
         # Method 1: Direct digit extraction
-        direct_digits = self._extract_direct_digits(text)
+        direct_digits = self._extract_direct_digits(text) if has_digits else []
         if direct_digits:
-            extracted_numbers.extend(direct_digits)
+            extracted_numbers.update(direct_digits)
             confidence_scores.append(0.9)
         
-        # Method 2: Word-to-number conversion
-        word_numbers = self._extract_word_numbers(text)
-        if word_numbers:
-            extracted_numbers.extend(word_numbers)
-            confidence_scores.append(0.8)
-        
-        # Method 3: Context-aware extraction
-        context_numbers = self._extract_context_numbers(text)
-        if context_numbers:
-            extracted_numbers.extend(context_numbers)
-            confidence_scores.append(0.85)
-        
-        # Method 4: Sequential number detection
-        sequential_numbers = self._extract_sequential_numbers(text)
-        if sequential_numbers:
-            extracted_numbers.extend(sequential_numbers)
-            confidence_scores.append(0.75)
-        
-        # Method 5: Advanced pattern matching
-        pattern_numbers = self._extract_pattern_numbers(text)
-        if pattern_numbers:
-            extracted_numbers.extend(pattern_numbers)
-            confidence_scores.append(0.7)
+        # A long digit run in a transcript without number words is already the
+        # answer; the word and pattern passes would only find parts of it
+        tokens = text.split()
+        if self._exhaustive_extraction or not self._direct_digits_conclusive(direct_digits, tokens):
+            # Methods 2 and 4 (word-to-number and sequential digits) share one
+            # pass over the words
+            word_numbers, sequential_numbers = self._extract_token_numbers(tokens)
+            
+            # Method 2: Word-to-number conversion
+            if word_numbers:
+                extracted_numbers.update(word_numbers)
+                confidence_scores.append(0.8)
+            
+            # Method 3: Context-aware extraction
+            context_numbers = self._extract_context_numbers(text)
+            if context_numbers:
+                extracted_numbers.update(context_numbers)
+                confidence_scores.append(0.85)
+            
+            # Method 4: Sequential number detection
+            if sequential_numbers:
+                extracted_numbers.update(sequential_numbers)
+                confidence_scores.append(0.75)
+            
+            # Method 5: Advanced pattern matching
+            pattern_numbers = self._extract_pattern_numbers(text) if has_digits else []
+            if pattern_numbers:
+                extracted_numbers.update(pattern_numbers)
+                confidence_scores.append(0.7)
         
-        # Remove duplicates and filter by length
-        unique_numbers = self._filter_and_dedupe(extracted_numbers)
+        # Filter by length and order the unique numbers
+        unique_numbers = self._filter_and_sort(extracted_numbers)
         
         # Calculate overall confidence
         overall_confidence = max(confidence_scores) if confidence_scores else 0.0
         
-        logger.info(f"Extracted numbers: {unique_numbers} (confidence: {overall_confidence:.2f})")
+        logger.info("Extracted numbers: %s (confidence: %.2f)", unique_numbers, overall_confidence)
         
-        return unique_numbers, overall_confidence
+        return tuple(unique_numbers), overall_confidence
+    
+    def _direct_digits_conclusive(self, direct_digits: List[str], tokens: List[str]) -> bool:
+        """Whether direct digits alone settle the result (8-20 digits, no number words)"""
+        # Runs over 20 digits are dropped by _filter_and_sort, so they can't
+        # stand in for the other extraction methods
+        return (
+            any(8 <= len(digits) <= 20 for digits in direct_digits)
+            and _WORD_TO_NUM.keys().isdisjoint(tokens)
+        )
     
     def _clean_text(self, text: str) -> str:
         """Clean and normalize text for processing"""
+        # ASCII text (the usual transcription) is lowercased and stripped of
+        # punctuation in one translate pass; split/join normalizes whitespace
+        if text.isascii():
+            return ' '.join(text.translate(_ASCII_CLEAN_TABLE).split())
+        
         # Convert to lowercase
         text = text.lower()
         
         # Remove punctuation except dashes and spaces
-        text = re.sub(r'[^\w\s\-]', ' ', text)
+        text = _PUNCT_RE.sub(' ', text)
         
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_RE.sub(' ', text).strip()
         
         return text
     
     def _extract_direct_digits(self, text: str) -> List[str]:
         """Extract sequences of digits directly"""
-        # Enhanced patterns for better 8-digit and longer number detection
-        digit_patterns = [
-            r'\b(\d{3,})\b',  # Basic digit sequences (3+ digits)
-            r'\b(\d{8})\b',   # Specifically target 8-digit sequences
-            r'\b(\d{4}\s*\d{4})\b',  # 8-digit with optional space in middle
-            r'(\d{1,4}[-\s]\d{1,4}[-\s]\d{1,4})',  # Separated sequences
-            r'(\d{1,3}\s+\d{1,3}\s+\d{1,3}\s+\d{1,3})',  # 4-part space-separated
-            r'(\d{2}\s+\d{2}\s+\d{2}\s+\d{2})',  # 8-digit as 4 pairs
-            r'(\d{1}\s+\d{1}\s+\d{1}\s+\d{1}\s+\d{1}\s+\d{1}\s+\d{1}\s+\d{1})',  # 8 individual digits
-        ]
-        
         extracted = []
-        for pattern in digit_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
-                # Clean the match and extract only digits
-                digits = re.sub(r'[^\d]', '', match)
-                if len(digits) >= 3:  # Accept 3+ digit sequences
+        seen = set()
+        for match in _DIRECT_RE.findall(text):
+            # Most matches have no separators and are used as they are
+            digits = match if match.isdecimal() else match.translate(_DIGITS_ONLY)
+            candidates = [digits]
+            # A run joined across spaces may be several numbers spoken in a
+            # row, so each space-separated group of 3+ digits is kept as well
+            if ' ' in match:
+                candidates.extend(
+                    group for group in (part.translate(_DIGITS_ONLY) for part in match.split())
+                    if len(group) >= 3
+                )
+            for digits in candidates:
+                if digits not in seen:
+                    seen.add(digits)
                     extracted.append(digits)
         
         return extracted
     
-    def _extract_word_numbers(self, text: str) -> List[str]:
-        """Convert spoken numbers to digits"""
-        extracted = []
-        
-        # Split text into words
-        words = text.split()
+    def _extract_token_numbers(self, words: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Scan the words once for both spoken-number forms
+        Returns: (word-number sequences, digit-by-digit sequences)
+        """
+        word_numbers = []
+        sequential_numbers = []
         
-        # Find sequences of number words
-        number_sequences = []
-        current_sequence = []
+        # Runs of number words or digit tokens; filler words neither join nor
+        # break a run, at least 2 words are needed
+        number_run = []
+        # Digits spoken one by one ("one two three four"); at least 3 needed
+        digit_run = []
         
         for word in words:
-            if word in self.word_to_number or word.isdigit():
-                current_sequence.append(word)
-            elif word not in self.filler_words and current_sequence:
-                if len(current_sequence) >= 2:  # At least 2 number words
-                    number_sequences.append(current_sequence)
-                current_sequence = []
-            # Continue sequence if it's a filler word
-        
-        # Don't forget the last sequence
-        if len(current_sequence) >= 2:
-            number_sequences.append(current_sequence)
-        
-        # Convert each sequence to digits
-        for sequence in number_sequences:
-            digits = self._convert_word_sequence_to_digits(sequence)
-            if digits and len(digits) >= 3:
-                extracted.append(digits)
-        
-        return extracted
+            is_filler = word in _FILLER
+            
+            if word in _WORD_TO_NUM or word.isdigit():
+                number_run.append(word)
+            elif not is_filler and number_run:
+                if len(number_run) >= 2:
+                    digits = self._convert_word_sequence_to_digits(number_run)
+                    if len(digits) >= 3:
+                        word_numbers.append(digits)
+                number_run = []
+            
+            if word in _NUMBER_WORDS:
+                digit_run.append(_WORD_TO_NUM[word])
+            elif word.isdigit() and len(word) == 1:
+                digit_run.append(word)
+            elif not is_filler:
+                if len(digit_run) >= 3:
+                    sequential_numbers.append(''.join(digit_run))
+                digit_run = []
+        
+        # Don't forget the last sequences
+        if len(number_run) >= 2:
+            digits = self._convert_word_sequence_to_digits(number_run)
+            if len(digits) >= 3:
+                word_numbers.append(digits)
+        if len(digit_run) >= 3:
+            sequential_numbers.append(''.join(digit_run))
+        
+        return word_numbers, sequential_numbers
     
     def _convert_word_sequence_to_digits(self, word_sequence: List[str]) -> str:
         """Convert a sequence of number words to digits"""
-        digits = ""
-        
-        for word in word_sequence:
-            if word.isdigit():
-                digits += word
-            elif word in self.word_to_number:
-                digit = self.word_to_number[word]
-                # Handle special cases like "hundred", "thousand"
-                if word in ['hundred', 'thousand']:
-                    # These modify the previous number
-                    continue
-                digits += digit
-        
-        return digits
+        # "hundred" and "thousand" modify the previous number and are skipped
+        return ''.join([
+            word if word.isdigit() else _SPOKEN_DIGITS.get(word, '')
+            for word in word_sequence
+        ])
     
     def _extract_context_numbers(self, text: str) -> List[str]:
         """Extract numbers that appear after context keywords"""
         extracted = []
         
-        for keyword in self.context_keywords:
-            # Look for patterns like "pin is 1234" or "code: one two three four"
-            patterns = [
-                rf'{keyword}\s+(?:is|number|code)?\s*(\d{{3,}})',
-                rf'{keyword}\s+(?:is|number|code)?\s*([zero-nine\s]{{10,}})',
-                rf'my\s+{keyword}\s+(?:is|number)?\s*(\d{{3,}})',
-                rf'the\s+{keyword}\s+(?:is|number)?\s*(\d{{3,}})',
-            ]
-            
-            for pattern in patterns:
-                matches = re.findall(pattern, text, re.IGNORECASE)
-                for match in matches:
-                    if match.isdigit():
-                        extracted.append(match)
-                    else:
-                        # Convert word numbers
-                        digits = self._convert_words_to_digits(match)
-                        if digits and len(digits) >= 3:
-                            extracted.append(digits)
+        for match in _CONTEXT_RE.findall(text):
+            if match.isdigit():
+                extracted.append(match)
+            else:
+                # Convert word numbers
+                digits = self._convert_words_to_digits(match)
+                if digits and len(digits) >= 3:
+                    extracted.append(digits)
         
         return extracted
     
-    def _extract_sequential_numbers(self, text: str) -> List[str]:
-        """Extract sequences of individual numbers spoken one by one"""
-        # Pattern for sequences like "one two three four five six"
-        words = text.split()
-        sequences = []
-        current_sequence = []
-        
-        for word in words:
-            if word in self.word_to_number and word not in ['hundred', 'thousand']:
-                current_sequence.append(self.word_to_number[word])
-            elif word.isdigit() and len(word) == 1:
-                current_sequence.append(word)
-            elif word not in self.filler_words:
-                if len(current_sequence) >= 3:
-                    sequences.append(''.join(current_sequence))
-                current_sequence = []
-        
-        # Don't forget the last sequence
-        if len(current_sequence) >= 3:
-            sequences.append(''.join(current_sequence))
-        
-        return sequences
-    
     def _extract_pattern_numbers(self, text: str) -> List[str]:
         """Extract numbers using advanced pattern matching"""
-        patterns = [
-            r'(?:call|phone|dial)\s+(\d{10,})',  # Phone numbers
-            r'(?:zip|postal)\s+(?:code)?\s*(\d{5})',  # ZIP codes
-            r'(?:ssn|social)\s+(?:security)?\s*(\d{3}[-\s]?\d{2}[-\s]?\d{4})',  # SSN
-            r'(\d{4}[-\s]\d{4}[-\s]\d{4}[-\s]\d{4})',  # Credit card
-            r'(?:account|member)\s+(?:number)?\s*(\d{6,})',  # Account numbers
-        ]
-        
         extracted = []
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
+        for pattern in self._advanced_patterns:
+            matches = pattern.findall(text)
             for match in matches:
-                digits = re.sub(r'[^\d]', '', match)
+                digits = match if match.isdecimal() else match.translate(_DIGITS_ONLY)
                 if len(digits) >= 3:
                     extracted.append(digits)
         
@@ -247,54 +339,53 @@ class NumberExtractor:
     
     def _convert_words_to_digits(self, text: str) -> str:
         """Convert a string containing number words to digits"""
-        digits = ""
-        words = text.split()
-        
-        for word in words:
-            if word in self.word_to_number:
-                digits += self.word_to_number[word]
-            elif word.isdigit():
-                digits += word
-        
-        return digits
+        return ''.join([
+            _WORD_TO_NUM.get(word, word if word.isdigit() else '')
+            for word in text.split()
+        ])
     
-    def _filter_and_dedupe(self, numbers: List[str]) -> List[str]:
-        """Filter numbers by length and remove duplicates"""
-        # Remove duplicates while preserving order
-        seen = set()
-        unique_numbers = []
-        
-        for num in numbers:
-            # Accept any sequence of 3+ digits, including 8-digit numbers
-            if num not in seen and len(num) >= 3 and len(num) <= 20:  # Up to 20 digits max
-                seen.add(num)
-                unique_numbers.append(num)
+    def _filter_and_sort(self, numbers: Set[str]) -> List[str]:
+        """Filter unique numbers by length and sort them"""
+        # Accept any sequence of 3+ digits, including 8-digit numbers
+        unique_numbers = [num for num in numbers if 3 <= len(num) <= 20]  # Up to 20 digits max
         
         # Sort by length (longer numbers first) then by value
-        # This ensures 8-digit numbers appear before shorter ones
-        unique_numbers.sort(key=lambda x: (-len(x), x))
+        # This ensures 8-digit numbers appear before shorter ones. Two passes:
+        # the reverse length sort is stable, so equal lengths stay in value order
+        unique_numbers.sort()
+        unique_numbers.sort(key=len, reverse=True)
         
         return unique_numbers
     
     def extract_with_advanced_nlp(self, text: str) -> List[str]:
-        """Advanced extraction using word2number library"""
+        """Advanced extraction of compound number expressions ("five hundred twenty")"""
         try:
-            # Try to extract using word2number for more complex number expressions
-            words = text.split()
             extracted = []
             
-            # Look for number word sequences
-            for i in range(len(words)):
-                for j in range(i + 2, min(i + 10, len(words) + 1)):  # Max 10 words
-                    phrase = ' '.join(words[i:j])
-                    try:
-                        number = w2n.word_to_num(phrase)
-                        if number and len(str(number)) >= 3:
-                            extracted.append(str(number))
-                    except:
-                        continue
+            # Each maximal run of 2+ number words is found by one regex scan and
+            # evaluated once
+            for match in _NUMBER_RUN_RE.finditer(text):
+                number = self._words_to_value(match.group().split())
+                if number and len(str(number)) >= 3:
+                    extracted.append(str(number))
             
             return extracted
         except Exception as e:
             logger.warning(f"Advanced NLP extraction failed: {e}")
             return []
+    
+    def _words_to_value(self, words: List[str]) -> int:
+        """Evaluate a run of number words as one quantity"""
+        total = 0
+        chunk = 0
+        
+        for word in words:
+            if word == 'hundred':
+                chunk = (chunk or 1) * 100
+            elif word == 'thousand':
+                total += (chunk or 1) * 1000
+                chunk = 0
+            else:
+                chunk += _WORD_VALUES[word]
+        
+        return total + chunk
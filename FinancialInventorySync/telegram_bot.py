@@ -2,13 +2,16 @@ import logging
 import os
 import asyncio
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
+from telegram.request import HTTPXRequest
+from telegram.ext import Application, BaseUpdateProcessor, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
 from database import Database
 from twilio_client import TwilioVoiceClient
 from tts_config import TTSConfig
-from config import Config
+from config import Config, get_webhook_url
 import json
 import time
+import weakref
+from collections import OrderedDict
 
 # Configure logging
 logging.basicConfig(
@@ -17,45 +20,32 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class TelegramBot:
-    """Main Telegram bot class with all command handlers"""
-    
-    def __init__(self):
-        self.db = Database(Config.DATABASE_PATH)
-        self.twilio_client = TwilioVoiceClient()
-        self.tts_config = TTSConfig()
-        
-        # Create application
-        self.application = Application.builder().token(Config.TELEGRAM_BOT_TOKEN).build()
-        
-        # Register handlers
-        self._register_handlers()
-    
-    def _register_handlers(self):
-        """Register all command and callback handlers"""
-        
-        # Command handlers
-        self.application.add_handler(CommandHandler("start", self.start_command))
-        self.application.add_handler(CommandHandler("help", self.help_command))
-        self.application.add_handler(CommandHandler("call", self.call_command))
-        self.application.add_handler(CommandHandler("calltts", self.calltts_command))
-        self.application.add_handler(CommandHandler("upload", self.upload_command))
-        self.application.add_handler(CommandHandler("list", self.list_command))
-        self.application.add_handler(CommandHandler("delete", self.delete_command))
-        self.application.add_handler(CommandHandler("history", self.history_command))
-        self.application.add_handler(CommandHandler("setup", self.setup_command))
-        
-        # Message handlers
-        self.application.add_handler(MessageHandler(filters.AUDIO, self.handle_audio_upload))
-        self.application.add_handler(MessageHandler(filters.VOICE, self.handle_audio_upload))
-        self.application.add_handler(MessageHandler(filters.Document.AUDIO, self.handle_audio_upload))
-        
-        # Callback query handler for inline keyboards
-        self.application.add_handler(CallbackQueryHandler(self.handle_callback_query))
-    
-    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /start command"""
-        welcome_message = """
+# Updates handled at the same time; updates from one chat still run in order
+MAX_CONCURRENT_UPDATES = 256
+
+# Connections for Bot API calls made by handlers
+BOT_API_POOL_SIZE = 256
+
+# Audio downloads that may run at the same time across all chats
+UPLOAD_WORKERS = 4
+
+# Users whose audio file lists are kept in memory; the least recently used
+# list is dropped beyond this
+AUDIO_CACHE_USERS = 256
+
+# Keyboard message edits sent per second across all chats (the Bot API allows
+# about 30), and how many may wait before the oldest is dropped
+OUTBOX_RATE = 30
+OUTBOX_MAX_SIZE = 1000
+
+# Longer replies are sent in pieces of at most this many characters
+MAX_MESSAGE_CHUNK = 4000
+
+# Closes each /history entry
+_HISTORY_SEPARATOR = "─" * 30 + "\n\n"
+
+# Static command replies, built once at import
+WELCOME_MESSAGE = """
 🤖 Welcome to the Advanced Telegram Calling Bot!
 
 This bot can make phone calls using either uploaded audio files or text-to-speech, and extract numbers from responses.
@@ -76,12 +66,9 @@ This bot can make phone calls using either uploaded audio files or text-to-speec
 3. Or use TTS with /calltts +1234567890 Hello, please provide your PIN
 
 Let's get started! 🚀
-        """
-        await update.message.reply_text(welcome_message)
-    
-    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Handle /help command"""
-        help_message = """
+"""
+
+HELP_MESSAGE = """
 📚 Detailed Help - Telegram Calling Bot
 
 🎵 AUDIO CALLS:
@@ -127,8 +114,263 @@ Supported formats: "one two three four", "1234", "twelve thirty-four"
 - Check /history to review past calls and responses
 
 Need help? Contact support! 🆘
-        """
-        await update.message.reply_text(help_message)
+"""
+
+UPLOAD_MESSAGE = (
+    "📁 Send me an audio file to upload!\n\n"
+    "Supported formats: MP3, WAV, M4A, OGG\n"
+    "Maximum size: 50MB\n\n"
+    "You can send:\n"
+    "• Audio files as documents\n"
+    "• Voice messages\n"
+    "• Music files\n\n"
+    "The file will be processed and added to your audio library."
+)
+
+# /setup only fills in the audio file count per call; the configuration
+# values are fixed for the life of the process
+SETUP_MESSAGE_TEMPLATE = """
+⚙️ Bot Configuration:
+
+🔑 Current Settings:
+• Twilio Account: {twilio_account}...
+• Twilio Number: {twilio_number}
+• Webhook URL: {base_url}
+• Max Call Duration: {max_call_duration}s
+• Max Listening: {max_listening_duration}s
+
+📊 Database Status:
+• Audio files stored: {audio_count}
+• Database path: {database_path}
+
+🌐 Environment:
+• Base URL: {base_url}
+• Webhook Port: {webhook_port}
+
+✅ Bot is configured and ready!
+"""
+_SETUP_FIELDS = {
+    'twilio_account': Config.TWILIO_ACCOUNT_SID[:8],
+    'twilio_number': Config.TWILIO_PHONE_NUMBER,
+    'base_url': Config.BASE_URL,
+    'max_call_duration': Config.MAX_CALL_DURATION,
+    'max_listening_duration': Config.MAX_LISTENING_DURATION,
+    'database_path': Config.DATABASE_PATH,
+    'webhook_port': Config.WEBHOOK_PORT,
+}
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Processes updates from different chats concurrently and updates from one chat in order"""
+    
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # Per-chat locks; asyncio.Lock wakes waiters in arrival order, and
+        # entries disappear once no update holds them
+        self._chat_locks = weakref.WeakValueDictionary()
+    
+    async def do_process_update(self, update, coroutine):
+        """Run the update's handlers once earlier updates from its chat are done"""
+        chat = getattr(update, 'effective_chat', None)
+        if chat is None:
+            await coroutine
+            return
+        
+        lock = self._chat_locks.get(chat.id)
+        if lock is None:
+            lock = self._chat_locks[chat.id] = asyncio.Lock()
+        async with lock:
+            await coroutine
+    
+    async def initialize(self):
+        """Nothing to set up"""
+    
+    async def shutdown(self):
+        """Nothing to tear down"""
+
+class TelegramBot:
+    """Main Telegram bot class with all command handlers"""
+    
+    def __init__(self):
+        self.db = Database(Config.DATABASE_PATH)
+        self.twilio_client = TwilioVoiceClient()
+        self.tts_config = TTSConfig()
+        
+        # The audio directory is ensured once here rather than on every upload
+        os.makedirs(Config.AUDIO_STORAGE_PATH, exist_ok=True)
+        
+        # Files in the audio directory, counted once and then kept up to date
+        # by uploads and deletes so /setup doesn't list the directory
+        with os.scandir(Config.AUDIO_STORAGE_PATH) as entries:
+            self._audio_count = sum(1 for _ in entries)
+        
+        # Set by run(); used to reach the bot's event loop from other threads
+        self._loop = None
+        self._stop_event = None
+        
+        # Fire-and-forget work (file deletions, call placement), referenced
+        # until it finishes so the tasks aren't garbage collected
+        self._background_tasks = set()
+        
+        # user_id -> {audio_id: audio file row}, least recently used first;
+        # dropped whenever the user uploads or deletes a file
+        self._audio_cache = OrderedDict()
+        
+        # Per-chat upload queues, each drained by its own worker task, with at
+        # most UPLOAD_WORKERS downloads running at once
+        self._upload_queues = {}
+        self._upload_tasks = set()
+        self._upload_slots = asyncio.Semaphore(UPLOAD_WORKERS)
+        
+        # Pending keyboard message edits, one per message, sent in order by
+        # _outbox_sender within the Bot API rate limit
+        self._outbox = OrderedDict()
+        self._outbox_ready = asyncio.Event()
+        self._outbox_task = None
+        
+        # Per-user callback locks; entries disappear once no callback holds them
+        self._session_locks = weakref.WeakValueDictionary()
+        
+        # Create application
+        # A slow update in one chat no longer holds up the others; handlers
+        # share a connection pool sized for that concurrency, while polling
+        # keeps its own small one
+        self.application = (
+            Application.builder()
+            .token(Config.TELEGRAM_BOT_TOKEN)
+            .request(HTTPXRequest(
+                connection_pool_size=BOT_API_POOL_SIZE,
+                connect_timeout=5.0,
+                read_timeout=20.0,
+                pool_timeout=1.0
+            ))
+            .concurrent_updates(PerChatUpdateProcessor(MAX_CONCURRENT_UPDATES))
+            .build()
+        )
+        
+        # Static inline keyboards are built once and reused for every reply
+        self._build_static_keyboards()
+        
+        # Register handlers
+        self._register_handlers()
+    
+    def _build_static_keyboards(self):
+        """Build the keyboards whose buttons never change"""
+        # Main TTS configuration
+        self._tts_main_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🗣️ Select Voice", callback_data="config_voice"),
+             InlineKeyboardButton("🌍 Select Language", callback_data="config_language")],
+            [InlineKeyboardButton("🎵 Voice Settings", callback_data="config_settings"),
+             InlineKeyboardButton("⚙️ Advanced SSML", callback_data="config_ssml")],
+            [InlineKeyboardButton("▶️ Start Call Now", callback_data="tts_start_call")],
+            [InlineKeyboardButton("❌ Cancel Call", callback_data="cancel_call")]
+        ])
+        
+        # Voice selection
+        self._voice_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("👨 Male Voice", callback_data="voice_male_en")],
+            [InlineKeyboardButton("👩 Female Voice", callback_data="voice_female_en")],
+            [InlineKeyboardButton("🤖 Robotic Voice", callback_data="voice_robotic")],
+            [InlineKeyboardButton("👦 Child Voice", callback_data="voice_child")],
+            [InlineKeyboardButton("👴 Elderly Voice", callback_data="voice_elderly")],
+            [InlineKeyboardButton("🎭 Celebrity Voice", callback_data="voice_celebrity")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
+        ])
+        
+        # Language selection
+        self._language_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🇺🇸 English (US)", callback_data="lang_en-US")],
+            [InlineKeyboardButton("🇬🇧 English (UK)", callback_data="lang_en-GB")],
+            [InlineKeyboardButton("🇪🇸 Spanish", callback_data="lang_es-ES")],
+            [InlineKeyboardButton("🇫🇷 French", callback_data="lang_fr-FR")],
+            [InlineKeyboardButton("🇩🇪 German", callback_data="lang_de-DE")],
+            [InlineKeyboardButton("🇮🇹 Italian", callback_data="lang_it-IT")],
+            [InlineKeyboardButton("🇯🇵 Japanese", callback_data="lang_ja-JP")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
+        ])
+        
+        # Voice settings
+        self._voice_settings_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🐌 Slow Speed", callback_data="speed_slow"),
+             InlineKeyboardButton("🚶 Normal Speed", callback_data="speed_normal"),
+             InlineKeyboardButton("🏃 Fast Speed", callback_data="speed_fast")],
+            [InlineKeyboardButton("🔉 Low Pitch", callback_data="pitch_low"),
+             InlineKeyboardButton("🔊 Normal Pitch", callback_data="pitch_normal"),
+             InlineKeyboardButton("📢 High Pitch", callback_data="pitch_high")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
+        ])
+        
+        # SSML options
+        self._ssml_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("⏸️ Add Pauses", callback_data="ssml_pauses")],
+            [InlineKeyboardButton("📈 Emphasis", callback_data="ssml_emphasis")],
+            [InlineKeyboardButton("🎼 Prosody Control", callback_data="ssml_prosody")],
+            [InlineKeyboardButton("🔤 Spell Numbers", callback_data="ssml_spell")],
+            [InlineKeyboardButton("📢 Volume Control", callback_data="ssml_volume")],
+            [InlineKeyboardButton("💬 Break Sentences", callback_data="ssml_breaks")],
+            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
+        ])
+        
+        # List management
+        self._list_management_kb = InlineKeyboardMarkup([
+            [InlineKeyboardButton("➕ Upload Audio", callback_data="upload_new")],
+            [InlineKeyboardButton("🎤 Create TTS", callback_data="create_tts")],
+            [InlineKeyboardButton("📊 View History", callback_data="view_history")]
+        ])
+    
+    def _register_handlers(self):
+        """Register all command and callback handlers"""
+        
+        # Command handlers
+        self.application.add_handler(CommandHandler("start", self.start_command))
+        self.application.add_handler(CommandHandler("help", self.help_command))
+        self.application.add_handler(CommandHandler("call", self.call_command))
+        self.application.add_handler(CommandHandler("calltts", self.calltts_command))
+        self.application.add_handler(CommandHandler("upload", self.upload_command))
+        self.application.add_handler(CommandHandler("list", self.list_command))
+        self.application.add_handler(CommandHandler("delete", self.delete_command))
+        self.application.add_handler(CommandHandler("history", self.history_command))
+        self.application.add_handler(CommandHandler("setup", self.setup_command))
+        
+        # Message handlers
+        self.application.add_handler(MessageHandler(filters.AUDIO, self.handle_audio_upload))
+        self.application.add_handler(MessageHandler(filters.VOICE, self.handle_audio_upload))
+        self.application.add_handler(MessageHandler(filters.Document.AUDIO, self.handle_audio_upload))
+        
+        # Callback query handler for inline keyboards
+        self.application.add_handler(CallbackQueryHandler(self.handle_callback_query))
+        
+        # Callback data -> handler; keys are either a whole callback value or
+        # the prefix before its first "_"
+        self._cb_dispatch = {
+            "start_call": self._handle_call_start,
+            "confirm_tts_call": self._handle_call_start,
+            "cancel_call": self._handle_call_cancel,
+            "back_to_main": self._handle_back_to_main,
+            "audio": self._handle_audio_callback,
+            "config": self._handle_config_callback,
+            "voice": self._handle_voice_select,
+            "lang": self._handle_language_select,
+            "speed": self._handle_speed_select,
+            "pitch": self._handle_pitch_select,
+            "ssml": self._handle_ssml_select,
+            "tts": self._handle_tts_summary,
+        }
+        
+        # Configuration submenus: callback value -> (prompt, keyboard)
+        self._config_menus = {
+            "config_voice": ("🗣️ Select a voice for your call:", self._voice_kb),
+            "config_language": ("🌍 Select language for text-to-speech:", self._language_kb),
+            "config_settings": ("🎵 Configure voice speed and pitch:", self._voice_settings_kb),
+            "config_ssml": ("⚙️ Advanced SSML options:", self._ssml_kb),
+        }
+    
+    async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /start command"""
+        await update.message.reply_text(WELCOME_MESSAGE)
+    
+    async def help_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Handle /help command"""
+        await update.message.reply_text(HELP_MESSAGE)
     
     async def call_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /call command for audio calls"""
@@ -153,7 +395,7 @@ Need help? Contact support! 🆘
         formatted_number = self.twilio_client.format_phone_number(phone_number)
         
         # Get user's audio files
-        audio_files = self.db.get_user_audio_files(user_id)
+        audio_files = await self._get_audio_files(user_id)
         
         if not audio_files:
             await update.message.reply_text(
@@ -161,15 +403,16 @@ Need help? Contact support! 🆘
             )
             return
         
-        # Save call context in user session
+        # Save call context in user session; only the IDs are stored, the
+        # rows stay in the audio cache
         self.db.save_user_session(user_id, {
             'action': 'audio_call',
             'phone_number': formatted_number,
-            'audio_files': audio_files
+            'audio_file_ids': list(audio_files)
         })
         
         # Create audio selection keyboard
-        keyboard = self._create_audio_selection_keyboard(audio_files)
+        keyboard = self._create_audio_selection_keyboard(audio_files.values())
         
         await update.message.reply_text(
             f"📞 Setting up call to: {formatted_number}\n\n"
@@ -227,32 +470,25 @@ Need help? Contact support! 🆘
     
     async def upload_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /upload command"""
-        await update.message.reply_text(
-            "📁 Send me an audio file to upload!\n\n"
-            "Supported formats: MP3, WAV, M4A, OGG\n"
-            "Maximum size: 50MB\n\n"
-            "You can send:\n"
-            "• Audio files as documents\n"
-            "• Voice messages\n"
-            "• Music files\n\n"
-            "The file will be processed and added to your audio library."
-        )
+        await update.message.reply_text(UPLOAD_MESSAGE)
     
     async def list_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /list command"""
         user_id = update.effective_user.id
         
-        # Get audio files
-        audio_files = self.db.get_user_audio_files(user_id)
-        
         message = "📋 Your Audio Library:\n\n"
         
-        if audio_files:
+        # Rows are read on a worker thread and formatted without dict copies
+        audio_files = await asyncio.to_thread(self.db.get_user_audio_rows, user_id)
+        lines = []
+        for i, audio in enumerate(audio_files, 1):
+            duration = f" ({audio['duration']}s)" if audio['duration'] else ""
+            size_mb = f" - {audio['file_size'] / 1048576:.1f}MB" if audio['file_size'] else ""
+            lines.append(f"{i}. {audio['filename']}{duration}{size_mb}\n")
+        
+        if lines:
             message += "📁 Uploaded Audio Files:\n"
-            for i, audio in enumerate(audio_files, 1):
-                duration = f" ({audio['duration']}s)" if audio['duration'] else ""
-                size_mb = f" - {audio['file_size'] / 1024 / 1024:.1f}MB" if audio['file_size'] else ""
-                message += f"{i}. {audio['filename']}{duration}{size_mb}\n"
+            message += "".join(lines)
         else:
             message += "❌ No audio files uploaded yet.\n"
         
@@ -281,28 +517,39 @@ Need help? Contact support! 🆘
             await update.message.reply_text("❌ Invalid audio ID. Must be a number.")
             return
         
-        # Delete audio file
-        if self.db.delete_audio_file(user_id, audio_id):
-            # Also delete physical file
-            try:
-                audio_files = self.db.get_user_audio_files(user_id)
-                for audio in audio_files:
-                    if audio['id'] == audio_id and os.path.exists(audio['file_path']):
-                        os.remove(audio['file_path'])
-                        break
-            except Exception as e:
-                logger.warning(f"Could not delete physical file: {e}")
+        # Delete audio file; the record's path comes back from the same query
+        file_path = await asyncio.to_thread(self.db.delete_audio_file, user_id, audio_id)
+        if file_path:
+            self._audio_cache.pop(user_id, None)
+            # Also delete physical file, without holding up the reply
+            self._spawn(self._remove_audio_file(file_path))
             
             await update.message.reply_text("✅ Audio file deleted successfully!")
         else:
             await update.message.reply_text("❌ Audio file not found or could not be deleted.")
     
+    def _spawn(self, coro):
+        """Run a coroutine in the background"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    async def _remove_audio_file(self, file_path):
+        """Delete a stored audio file in a worker thread"""
+        try:
+            await asyncio.to_thread(os.remove, file_path)
+            self._audio_count -= 1
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not delete physical file: {e}")
+    
     async def history_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /history command"""
         user_id = update.effective_user.id
         
-        # Get call history
-        history = self.db.get_call_history(user_id, limit=10)
+        # Rows are read on a worker thread and formatted without dict copies
+        history = await asyncio.to_thread(self.db.get_call_history_rows, user_id, 10)
         
         if not history:
             await update.message.reply_text(
@@ -311,29 +558,33 @@ Need help? Contact support! 🆘
             )
             return
         
-        message = "📊 Recent Call History:\n\n"
-        
+        # Entries are collected into messages of at most MAX_MESSAGE_CHUNK
+        # characters, splitting between entries rather than inside one
+        parts = ["📊 Recent Call History:\n\n"]
+        length = len(parts[0])
         for i, call in enumerate(history, 1):
-            message += f"📞 Call #{i}\n"
-            message += f"📱 Number: {call['phone_number']}\n"
-            message += f"🕐 Date: {call['start_time']}\n"
-            message += f"📊 Status: {call['status']}\n"
-            
-            if call['full_transcription']:
-                message += f"🎤 Response: \"{call['full_transcription'][:100]}...\"\n"
-            
-            if call['extracted_numbers']:
-                message += f"🔢 Numbers: {call['extracted_numbers']}\n"
-            
-            message += "─" * 30 + "\n\n"
+            entry = self._format_history_entry(i, call)
+            if length + len(entry) > MAX_MESSAGE_CHUNK:
+                await update.message.reply_text("".join(parts))
+                parts.clear()
+                length = 0
+            parts.append(entry)
+            length += len(entry)
         
-        # Split message if too long
-        if len(message) > 4000:
-            messages = [message[i:i+4000] for i in range(0, len(message), 4000)]
-            for msg in messages:
-                await update.message.reply_text(msg)
-        else:
-            await update.message.reply_text(message)
+        await update.message.reply_text("".join(parts))
+    
+    @staticmethod
+    def _format_history_entry(i, call):
+        """Format one /history entry"""
+        response = f"🎤 Response: \"{call['full_transcription'][:100]}...\"\n" if call['full_transcription'] else ""
+        numbers = f"🔢 Numbers: {call['extracted_numbers']}\n" if call['extracted_numbers'] else ""
+        return (
+            f"📞 Call #{i}\n"
+            f"📱 Number: {call['phone_number']}\n"
+            f"🕐 Date: {time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(call['start_time']))}\n"
+            f"📊 Status: {call['status']}\n"
+            f"{response}{numbers}{_HISTORY_SEPARATOR}"
+        )
     
     async def setup_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle /setup command (admin only)"""
@@ -344,26 +595,10 @@ Need help? Contact support! 🆘
             await update.message.reply_text("❌ This command is only available to administrators.")
             return
         
-        setup_message = f"""
-⚙️ Bot Configuration:
-
-🔑 Current Settings:
-• Twilio Account: {Config.TWILIO_ACCOUNT_SID[:8]}...
-• Twilio Number: {Config.TWILIO_PHONE_NUMBER}
-• Webhook URL: {Config.BASE_URL}
-• Max Call Duration: {Config.MAX_CALL_DURATION}s
-• Max Listening: {Config.MAX_LISTENING_DURATION}s
-
-📊 Database Status:
-• Audio files stored: {len(os.listdir(Config.AUDIO_STORAGE_PATH))}
-• Database path: {Config.DATABASE_PATH}
-
-🌐 Environment:
-• Base URL: {Config.BASE_URL}
-• Webhook Port: {Config.WEBHOOK_PORT}
-
-✅ Bot is configured and ready!
-        """
+        setup_message = SETUP_MESSAGE_TEMPLATE.format(
+            audio_count=self._audio_count,
+            **_SETUP_FIELDS
+        )
         await update.message.reply_text(setup_message)
     
     async def handle_audio_upload(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -388,32 +623,63 @@ Need help? Contact support! 🆘
             # Check file size
             if file_obj.file_size > Config.MAX_AUDIO_FILE_SIZE:
                 await update.message.reply_text(
-                    f"❌ File too large. Maximum size is {Config.MAX_AUDIO_FILE_SIZE / 1024 / 1024:.1f}MB"
+                    f"❌ File too large. Maximum size is {Config.MAX_AUDIO_FILE_SIZE / 1048576:.1f}MB"
                 )
                 return
             
-            # Send processing message
-            processing_msg = await update.message.reply_text("📥 Processing audio file...")
+            # Downloads run outside the update handler: acknowledge now and let
+            # this chat's upload worker do the rest, in the order files arrive
+            processing_msg = await update.message.reply_text("📥 Audio file queued for processing...")
+            
+            chat_id = update.effective_chat.id
+            jobs = self._upload_queues.get(chat_id)
+            if jobs is None:
+                jobs = self._upload_queues[chat_id] = asyncio.Queue()
+                task = asyncio.create_task(self._upload_worker(chat_id, jobs))
+                self._upload_tasks.add(task)
+                task.add_done_callback(self._upload_tasks.discard)
+            jobs.put_nowait((user_id, file_obj, file_type, processing_msg))
             
+        except Exception as e:
+            logger.error(f"Error handling audio upload: {e}")
+            await update.message.reply_text(f"❌ Error processing audio file: {str(e)}")
+    
+    async def _upload_worker(self, chat_id: int, jobs: asyncio.Queue):
+        """Process one chat's queued uploads in order, then exit"""
+        try:
+            while not jobs.empty():
+                job = jobs.get_nowait()
+                # One failed upload must not drop the rest of the chat's queue
+                try:
+                    async with self._upload_slots:
+                        await self._process_upload(*job)
+                except Exception:
+                    logger.exception(f"Error processing upload for chat {chat_id}")
+        finally:
+            # No await since the queue was last seen empty, so nothing was added
+            del self._upload_queues[chat_id]
+    
+    async def _process_upload(self, user_id, file_obj, file_type, processing_msg):
+        """Download a queued audio file and save it to the library"""
+        try:
             # Download file
             file = await file_obj.get_file()
             filename = getattr(file_obj, 'file_name', f"audio_{int(time.time())}.ogg")
             
-            # Ensure audio directory exists
-            os.makedirs(Config.AUDIO_STORAGE_PATH, exist_ok=True)
-            
-            # Create unique filename
-            file_path = os.path.join(Config.AUDIO_STORAGE_PATH, f"{user_id}_{int(time.time())}_{filename}")
+            # Create unique filename; nanoseconds keep concurrent uploads apart
+            file_path = os.path.join(Config.AUDIO_STORAGE_PATH, f"{user_id}_{time.time_ns()}_{filename}")
             
             # Download file
             await file.download_to_drive(file_path)
+            self._audio_count += 1
             
             # Get file info
             duration = getattr(file_obj, 'duration', None)
             file_size = file_obj.file_size
             
             # Save to database
-            audio_id = self.db.save_audio_file(
+            audio_id = await asyncio.to_thread(
+                self.db.save_audio_file,
                 user_id=user_id,
                 file_id=file_obj.file_id,
                 filename=filename,
@@ -422,20 +688,23 @@ Need help? Contact support! 🆘
                 file_size=file_size,
                 format=file_type
             )
+            self._audio_cache.pop(user_id, None)
             
-            # Update message
-            await processing_msg.edit_text(
-                f"✅ Audio file uploaded successfully!\n\n"
-                f"📁 File: {filename}\n"
-                f"⏱️ Duration: {duration}s\n" if duration else ""
-                f"💾 Size: {file_size / 1024 / 1024:.1f}MB\n"
-                f"🆔 ID: {audio_id}\n\n"
-                f"Use /call <number> to make calls with this audio!"
-            )
+            # Update message; the duration line is left out when it's unknown
+            parts = ["✅ Audio file uploaded successfully!", "", f"📁 File: {filename}"]
+            if duration:
+                parts.append(f"⏱️ Duration: {duration}s")
+            parts.extend([
+                f"💾 Size: {file_size / 1048576:.1f}MB",
+                f"🆔 ID: {audio_id}",
+                "",
+                "Use /call <number> to make calls with this audio!"
+            ])
+            await processing_msg.edit_text("\n".join(parts))
             
         except Exception as e:
             logger.error(f"Error handling audio upload: {e}")
-            await update.message.reply_text(f"❌ Error processing audio file: {str(e)}")
+            await processing_msg.edit_text(f"❌ Error processing audio file: {str(e)}")
     
     async def handle_callback_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Handle inline keyboard callbacks"""
@@ -445,29 +714,32 @@ Need help? Contact support! 🆘
         user_id = query.from_user.id
         data = query.data
         
+        # One callback at a time per user, so rapid presses don't overwrite each
+        # other's session changes
+        lock = self._session_locks.get(user_id)
+        if lock is None:
+            lock = self._session_locks[user_id] = asyncio.Lock()
+        
         try:
-            # Get user session
-            session = self.db.get_user_session(user_id)
-            
-            if data.startswith("audio_"):
-                await self._handle_audio_callback(query, session, data)
-            elif data.startswith("tts_") or data.startswith("config_") or data.startswith("voice_") or data.startswith("lang_") or data.startswith("speed_") or data.startswith("pitch_") or data.startswith("ssml_"):
-                await self._handle_tts_callback(query, session, data)
-            elif data == "start_call" or data == "confirm_tts_call":
-                await self._handle_call_start(query, session)
-            elif data == "cancel_call":
-                await self._handle_call_cancel(query, session)
-            elif data == "back_to_main":
-                await self._handle_back_to_main(query, session)
+            async with lock:
+                # Get user session; hot sessions come straight from the cache
+                session = self.db.get_cached_user_session(user_id)
+                if session is None:
+                    session = await asyncio.to_thread(self.db.get_user_session, user_id)
+                
+                # Whole-value actions first, then the prefix before the first "_"
+                handler = self._cb_dispatch.get(data) or self._cb_dispatch.get(data.partition("_")[0])
+                if handler:
+                    await handler(query, session, data)
             
         except Exception as e:
             logger.error(f"Error handling callback query: {e}")
-            await query.edit_message_text(f"❌ Error: {str(e)}")
+            self._enqueue_edit(query, f"❌ Error: {str(e)}")
     
     async def _handle_audio_callback(self, query, session, data):
         """Handle audio selection callbacks"""
         if data == "audio_cancel":
-            await query.edit_message_text("❌ Audio call cancelled.")
+            self._enqueue_edit(query, "❌ Audio call cancelled.")
             self.db.clear_user_session(query.from_user.id)
             return
         
@@ -479,11 +751,13 @@ Need help? Contact support! 🆘
         self.db.save_user_session(query.from_user.id, session)
         
         # Get audio file info
-        audio_files = session.get('audio_files', [])
-        selected_audio = next((a for a in audio_files if a['id'] == audio_id), None)
+        selected_audio = None
+        if audio_id in session.get('audio_file_ids', ()):
+            audio_files = await self._get_audio_files(query.from_user.id)
+            selected_audio = audio_files.get(audio_id)
         
         if not selected_audio:
-            await query.edit_message_text("❌ Audio file not found.")
+            self._enqueue_edit(query, "❌ Audio file not found.")
             return
         
         # Show confirmation
@@ -493,7 +767,8 @@ Need help? Contact support! 🆘
             [InlineKeyboardButton("❌ Cancel", callback_data="cancel_call")]
         ])
         
-        await query.edit_message_text(
+        self._enqueue_edit(
+            query,
             f"📞 Ready to call: {session['phone_number']}\n"
             f"🎵 Audio: {selected_audio['filename']}\n"
             f"⏱️ Duration: {selected_audio.get('duration', 'Unknown')}s\n\n"
@@ -501,116 +776,161 @@ Need help? Contact support! 🆘
             reply_markup=keyboard
         )
     
-    async def _handle_tts_callback(self, query, session, data):
-        """Handle TTS configuration callbacks"""
-        user_id = query.from_user.id
+    async def _get_audio_files(self, user_id):
+        """Get a user's audio files keyed by ID (newest first), loading them into the audio cache if needed"""
+        audio_files = self._audio_cache.get(user_id)
+        if audio_files is not None:
+            self._audio_cache.move_to_end(user_id)
+            return audio_files
         
-        if data == "config_voice":
-            keyboard = self._create_voice_selection_keyboard()
-            await query.edit_message_text(
-                "🗣️ Select a voice for your call:",
-                reply_markup=keyboard
-            )
+        rows = await asyncio.to_thread(self.db.get_user_audio_files, user_id)
+        audio_files = self._audio_cache[user_id] = {audio['id']: audio for audio in rows}
+        if len(self._audio_cache) > AUDIO_CACHE_USERS:
+            self._audio_cache.popitem(last=False)
+        return audio_files
+    
+    def _enqueue_edit(self, query, text, reply_markup=None):
+        """Queue an edit of the callback's message; a newer edit replaces a pending one"""
+        message = query.message
+        key = (message.chat_id, message.message_id) if message else query.inline_message_id
+        self._outbox[key] = (query, text, reply_markup)
+        if len(self._outbox) > OUTBOX_MAX_SIZE:
+            self._outbox.popitem(last=False)
+            logger.warning("Edit outbox full, dropped the oldest pending edit")
+        self._outbox_ready.set()
+    
+    async def _outbox_sender(self):
+        """Send queued edits, at most OUTBOX_RATE per second"""
+        loop = asyncio.get_running_loop()
+        next_send = loop.time()
+        while True:
+            await self._outbox_ready.wait()
+            while self._outbox:
+                delay = next_send - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_send = max(next_send, loop.time()) + 1 / OUTBOX_RATE
+                
+                # Taken after the wait so edits that arrived meanwhile coalesce
+                _, (query, text, reply_markup) = self._outbox.popitem(last=False)
+                try:
+                    await query.edit_message_text(text, reply_markup=reply_markup)
+                except Exception as e:
+                    logger.error(f"Error sending queued edit: {e}")
+            self._outbox_ready.clear()
+    
+    async def _handle_config_callback(self, query, session, data):
+        """Show a TTS configuration submenu"""
+        menu = self._config_menus.get(data)
+        if menu:
+            prompt, keyboard = menu
+            self._enqueue_edit(query, prompt, reply_markup=keyboard)
+    
+    async def _handle_voice_select(self, query, session, data):
+        """Handle voice selection"""
+        voice_type = data.split("_", 1)[1]
+        session['tts_config']['voice_name'] = self.tts_config.get_voice_name(voice_type)
+        session['tts_config']['voice_type'] = voice_type
+        self.db.save_user_session(query.from_user.id, session)
         
-        elif data == "config_language":
-            keyboard = self._create_language_selection_keyboard()
-            await query.edit_message_text(
-                "🌍 Select language for text-to-speech:",
-                reply_markup=keyboard
-            )
+        self._enqueue_edit(
+            query,
+            f"✅ Voice selected: {self.tts_config.get_voice_display_name(voice_type)}\n\n"
+            f"Configure more settings:",
+            reply_markup=self._create_tts_main_keyboard()
+        )
+    
+    async def _handle_language_select(self, query, session, data):
+        """Handle language selection"""
+        language = data.split("_", 1)[1]
+        session['tts_config']['language'] = language
+        self.db.save_user_session(query.from_user.id, session)
         
-        elif data == "config_settings":
-            keyboard = self._create_voice_settings_keyboard()
-            await query.edit_message_text(
-                "🎵 Configure voice speed and pitch:",
-                reply_markup=keyboard
-            )
+        self._enqueue_edit(
+            query,
+            f"✅ Language selected: {language}\n\n"
+            f"Configure more settings:",
+            reply_markup=self._create_tts_main_keyboard()
+        )
+    
+    async def _handle_speed_select(self, query, session, data):
+        """Handle speed selection"""
+        speed_type = data.split("_", 1)[1]
+        session['tts_config']['speed'] = self.tts_config.get_speed_value(speed_type)
+        self.db.save_user_session(query.from_user.id, session)
         
-        elif data == "config_ssml":
-            keyboard = self._create_ssml_options_keyboard()
-            await query.edit_message_text(
-                "⚙️ Advanced SSML options:",
-                reply_markup=keyboard
-            )
+        self._enqueue_edit(
+            query,
+            f"✅ Speed set to: {speed_type}\n\n"
+            f"Configure more settings:",
+            reply_markup=self._create_tts_main_keyboard()
+        )
+    
+    async def _handle_pitch_select(self, query, session, data):
+        """Handle pitch selection"""
+        pitch_type = data.split("_", 1)[1]
+        session['tts_config']['pitch'] = self.tts_config.get_pitch_value(pitch_type)
+        self.db.save_user_session(query.from_user.id, session)
         
-        elif data.startswith("voice_"):
-            voice_type = data.split("_", 1)[1]
-            session['tts_config']['voice_name'] = self.tts_config.get_voice_name(voice_type)
-            session['tts_config']['voice_type'] = voice_type
-            self.db.save_user_session(user_id, session)
-            
-            await query.edit_message_text(
-                f"✅ Voice selected: {self.tts_config.get_voice_display_name(voice_type)}\n\n"
-                f"Configure more settings:",
-                reply_markup=self._create_tts_main_keyboard()
-            )
+        self._enqueue_edit(
+            query,
+            f"✅ Pitch set to: {pitch_type}\n\n"
+            f"Configure more settings:",
+            reply_markup=self._create_tts_main_keyboard()
+        )
+    
+    async def _handle_ssml_select(self, query, session, data):
+        """Handle SSML option selection"""
+        ssml_option = data.split("_", 1)[1]
+        session['tts_config']['ssml_enabled'] = True
+        session['tts_config'][f'ssml_{ssml_option}'] = True
+        self.db.save_user_session(query.from_user.id, session)
         
-        elif data.startswith("lang_"):
-            language = data.split("_", 1)[1]
-            session['tts_config']['language'] = language
-            self.db.save_user_session(user_id, session)
-            
-            await query.edit_message_text(
-                f"✅ Language selected: {language}\n\n"
-                f"Configure more settings:",
-                reply_markup=self._create_tts_main_keyboard()
-            )
+        self._enqueue_edit(
+            query,
+            f"✅ SSML option enabled: {ssml_option}\n\n"
+            f"Configure more settings:",
+            reply_markup=self._create_tts_main_keyboard()
+        )
+    
+    async def _handle_tts_summary(self, query, session, data):
+        """Show the TTS configuration summary before calling"""
+        if data != "tts_start_call":
+            return
         
-        elif data.startswith("speed_"):
-            speed_type = data.split("_", 1)[1]
-            session['tts_config']['speed'] = self.tts_config.get_speed_value(speed_type)
-            self.db.save_user_session(user_id, session)
-            
-            await query.edit_message_text(
-                f"✅ Speed set to: {speed_type}\n\n"
-                f"Configure more settings:",
-                reply_markup=self._create_tts_main_keyboard()
-            )
+        config = session['tts_config']
+        text = session['tts_text']
+        phone_number = session['phone_number']
         
-        elif data.startswith("pitch_"):
-            pitch_type = data.split("_", 1)[1]
-            session['tts_config']['pitch'] = self.tts_config.get_pitch_value(pitch_type)
-            self.db.save_user_session(user_id, session)
-            
-            await query.edit_message_text(
-                f"✅ Pitch set to: {pitch_type}\n\n"
-                f"Configure more settings:",
-                reply_markup=self._create_tts_main_keyboard()
-            )
+        summary = self.tts_config.format_config_summary(config, text)
+        summary += f"📞 Number: {phone_number}\n"
         
-        elif data.startswith("ssml_"):
-            ssml_option = data.split("_", 1)[1]
-            session['tts_config']['ssml_enabled'] = True
-            session['tts_config'][f'ssml_{ssml_option}'] = True
-            self.db.save_user_session(user_id, session)
-            
-            await query.edit_message_text(
-                f"✅ SSML option enabled: {ssml_option}\n\n"
-                f"Configure more settings:",
-                reply_markup=self._create_tts_main_keyboard()
-            )
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton("✅ Confirm & Call", callback_data="confirm_tts_call")],
+            [InlineKeyboardButton("✏️ Edit Settings", callback_data="back_to_main")],
+            [InlineKeyboardButton("❌ Cancel", callback_data="cancel_call")]
+        ])
         
-        elif data == "tts_start_call":
-            # Show configuration summary
-            config = session['tts_config']
-            text = session['tts_text']
-            phone_number = session['phone_number']
-            
-            summary = self.tts_config.format_config_summary(config, text)
-            summary += f"📞 Number: {phone_number}\n"
-            
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("✅ Confirm & Call", callback_data="confirm_tts_call")],
-                [InlineKeyboardButton("✏️ Edit Settings", callback_data="back_to_main")],
-                [InlineKeyboardButton("❌ Cancel", callback_data="cancel_call")]
-            ])
-            
-            await query.edit_message_text(summary, reply_markup=keyboard)
+        self._enqueue_edit(query, summary, reply_markup=keyboard)
     
-    async def _handle_call_start(self, query, session):
+    async def _handle_call_start(self, query, session, data):
         """Handle call initiation"""
         user_id = query.from_user.id
         
+        if session.get('action') not in ('audio_call', 'tts_call'):
+            self._enqueue_edit(query, "❌ Session expired. Please start over.")
+            return
+        
+        # Answer right away and place the call in the background; clearing the
+        # session first means a second press can't start another call
+        self._enqueue_edit(query, f"📞 Calling {session['phone_number']}...")
+        self.db.clear_user_session(user_id)
+        self._spawn(self._place_call(query, session))
+    
+    async def _place_call(self, query, session):
+        """Record the call, start it through Twilio and report the outcome"""
+        user_id = query.from_user.id
+        
         try:
             if session['action'] == 'audio_call':
                 # Audio call
@@ -618,7 +938,8 @@ Need help? Contact support! 🆘
                 phone_number = session['phone_number']
                 
                 # Create call session
-                session_id = self.db.create_call_session(
+                session_id = await asyncio.to_thread(
+                    self.db.create_call_session,
                     user_id=user_id,
                     phone_number=phone_number,
                     call_type='audio',
@@ -626,22 +947,27 @@ Need help? Contact support! 🆘
                 )
                 
                 # Initiate call
-                call_sid = self.twilio_client.make_audio_call(
+                call_sid = await asyncio.to_thread(
+                    self.twilio_client.make_audio_call,
                     phone_number, 
                     f"{Config.BASE_URL}/audio/{session_id}",
                     session_id
                 )
                 
                 if call_sid:
-                    self.db.update_call_session(session_id, twilio_call_sid=call_sid, status='initiated')
-                    await query.edit_message_text(
+                    await asyncio.to_thread(
+                        self.db.update_call_session,
+                        session_id, twilio_call_sid=call_sid, status='initiated'
+                    )
+                    self._enqueue_edit(
+                        query,
                         f"📞 Calling {phone_number}...\n"
                         f"🎵 Audio will play when answered\n"
                         f"🎤 Listening for response after playback\n\n"
                         f"Call ID: {call_sid[:8]}..."
                     )
                 else:
-                    await query.edit_message_text("❌ Failed to initiate call. Please try again.")
+                    self._enqueue_edit(query, "❌ Failed to initiate call. Please try again.")
             
             elif session['action'] == 'tts_call':
                 # TTS call
@@ -650,10 +976,11 @@ Need help? Contact support! 🆘
                 phone_number = session['phone_number']
                 
                 # Save TTS config
-                tts_config_id = self.db.save_tts_config(user_id, text, config)
+                tts_config_id = await asyncio.to_thread(self.db.save_tts_config, user_id, text, config)
                 
                 # Create call session
-                session_id = self.db.create_call_session(
+                session_id = await asyncio.to_thread(
+                    self.db.create_call_session,
                     user_id=user_id,
                     phone_number=phone_number,
                     call_type='tts',
@@ -661,146 +988,140 @@ Need help? Contact support! 🆘
                 )
                 
                 # Initiate call
-                call_sid = self.twilio_client.make_tts_call(phone_number, session_id)
+                call_sid = await asyncio.to_thread(self.twilio_client.make_tts_call, phone_number, session_id)
                 
                 if call_sid:
-                    self.db.update_call_session(session_id, twilio_call_sid=call_sid, status='initiated')
-                    await query.edit_message_text(
+                    await asyncio.to_thread(
+                        self.db.update_call_session,
+                        session_id, twilio_call_sid=call_sid, status='initiated'
+                    )
+                    self._enqueue_edit(
+                        query,
                         f"📞 Calling {phone_number}...\n"
                         f"🎙️ TTS will play when answered\n"
                         f"🎤 Listening for response after playback\n\n"
                         f"Call ID: {call_sid[:8]}..."
                     )
                 else:
-                    await query.edit_message_text("❌ Failed to initiate call. Please try again.")
-            
-            # Clear session
-            self.db.clear_user_session(user_id)
+                    self._enqueue_edit(query, "❌ Failed to initiate call. Please try again.")
             
         except Exception as e:
             logger.error(f"Error starting call: {e}")
-            await query.edit_message_text(f"❌ Error starting call: {str(e)}")
+            self._enqueue_edit(query, f"❌ Error starting call: {str(e)}")
     
-    async def _handle_call_cancel(self, query, session):
+    async def _handle_call_cancel(self, query, session, data):
         """Handle call cancellation"""
-        await query.edit_message_text("❌ Call cancelled.")
+        self._enqueue_edit(query, "❌ Call cancelled.")
         self.db.clear_user_session(query.from_user.id)
     
-    async def _handle_back_to_main(self, query, session):
+    async def _handle_back_to_main(self, query, session, data):
         """Handle back to main menu"""
         if session.get('action') == 'tts_call':
             keyboard = self._create_tts_main_keyboard()
-            await query.edit_message_text(
+            self._enqueue_edit(
+                query,
                 "Configure your text-to-speech settings:",
                 reply_markup=keyboard
             )
         else:
-            await query.edit_message_text("❌ Session expired. Please start over.")
+            self._enqueue_edit(query, "❌ Session expired. Please start over.")
     
     def _create_audio_selection_keyboard(self, audio_files):
         """Create keyboard for audio file selection"""
-        keyboard = []
-        for audio in audio_files:
-            duration = f" ({audio['duration']}s)" if audio['duration'] else ""
-            button_text = f"🎵 {audio['filename']}{duration}"
-            keyboard.append([InlineKeyboardButton(button_text, callback_data=f"audio_{audio['id']}")])
-        
+        keyboard = [
+            [InlineKeyboardButton(
+                f"🎵 {audio['filename']} ({audio['duration']}s)" if audio['duration'] else f"🎵 {audio['filename']}",
+                callback_data=f"audio_{audio['id']}"
+            )]
+            for audio in audio_files
+        ]
         keyboard.append([InlineKeyboardButton("❌ Cancel Call", callback_data="audio_cancel")])
         
         return InlineKeyboardMarkup(keyboard)
     
     def _create_tts_main_keyboard(self):
         """Create main TTS configuration keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("🗣️ Select Voice", callback_data="config_voice"),
-             InlineKeyboardButton("🌍 Select Language", callback_data="config_language")],
-            [InlineKeyboardButton("🎵 Voice Settings", callback_data="config_settings"),
-             InlineKeyboardButton("⚙️ Advanced SSML", callback_data="config_ssml")],
-            [InlineKeyboardButton("▶️ Start Call Now", callback_data="tts_start_call")],
-            [InlineKeyboardButton("❌ Cancel Call", callback_data="cancel_call")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._tts_main_kb
     
     def _create_voice_selection_keyboard(self):
         """Create voice selection keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("👨 Male Voice", callback_data="voice_male_en")],
-            [InlineKeyboardButton("👩 Female Voice", callback_data="voice_female_en")],
-            [InlineKeyboardButton("🤖 Robotic Voice", callback_data="voice_robotic")],
-            [InlineKeyboardButton("👦 Child Voice", callback_data="voice_child")],
-            [InlineKeyboardButton("👴 Elderly Voice", callback_data="voice_elderly")],
-            [InlineKeyboardButton("🎭 Celebrity Voice", callback_data="voice_celebrity")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._voice_kb
     
     def _create_language_selection_keyboard(self):
         """Create language selection keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("🇺🇸 English (US)", callback_data="lang_en-US")],
-            [InlineKeyboardButton("🇬🇧 English (UK)", callback_data="lang_en-GB")],
-            [InlineKeyboardButton("🇪🇸 Spanish", callback_data="lang_es-ES")],
-            [InlineKeyboardButton("🇫🇷 French", callback_data="lang_fr-FR")],
-            [InlineKeyboardButton("🇩🇪 German", callback_data="lang_de-DE")],
-            [InlineKeyboardButton("🇮🇹 Italian", callback_data="lang_it-IT")],
-            [InlineKeyboardButton("🇯🇵 Japanese", callback_data="lang_ja-JP")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._language_kb
     
     def _create_voice_settings_keyboard(self):
         """Create voice settings keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("🐌 Slow Speed", callback_data="speed_slow"),
-             InlineKeyboardButton("🚶 Normal Speed", callback_data="speed_normal"),
-             InlineKeyboardButton("🏃 Fast Speed", callback_data="speed_fast")],
-            [InlineKeyboardButton("🔉 Low Pitch", callback_data="pitch_low"),
-             InlineKeyboardButton("🔊 Normal Pitch", callback_data="pitch_normal"),
-             InlineKeyboardButton("📢 High Pitch", callback_data="pitch_high")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._voice_settings_kb
     
     def _create_ssml_options_keyboard(self):
         """Create SSML options keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("⏸️ Add Pauses", callback_data="ssml_pauses")],
-            [InlineKeyboardButton("📈 Emphasis", callback_data="ssml_emphasis")],
-            [InlineKeyboardButton("🎼 Prosody Control", callback_data="ssml_prosody")],
-            [InlineKeyboardButton("🔤 Spell Numbers", callback_data="ssml_spell")],
-            [InlineKeyboardButton("📢 Volume Control", callback_data="ssml_volume")],
-            [InlineKeyboardButton("💬 Break Sentences", callback_data="ssml_breaks")],
-            [InlineKeyboardButton("⬅️ Back", callback_data="back_to_main")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._ssml_kb
     
     def _create_list_management_keyboard(self):
         """Create list management keyboard"""
-        keyboard = [
-            [InlineKeyboardButton("➕ Upload Audio", callback_data="upload_new")],
-            [InlineKeyboardButton("🎤 Create TTS", callback_data="create_tts")],
-            [InlineKeyboardButton("📊 View History", callback_data="view_history")]
-        ]
-        return InlineKeyboardMarkup(keyboard)
+        return self._list_management_kb
     
     async def run(self):
         """Run the bot"""
         logger.info("Starting Telegram bot...")
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
         await self.application.initialize()
         await self.application.start()
-        await self.application.updater.start_polling()
+        if Config.TELEGRAM_USE_WEBHOOK:
+            # Updates arrive through the webhook server (feed_webhook_update)
+            await self.application.bot.set_webhook(
+                get_webhook_url() + Config.TELEGRAM_WEBHOOK_PATH,
+                secret_token=Config.TELEGRAM_WEBHOOK_SECRET or None
+            )
+        else:
+            await self.application.updater.start_polling()
+        self._outbox_task = asyncio.create_task(self._outbox_sender())
         
-        # Keep running
+        # Keep running until request_stop()
         try:
-            while True:
-                await asyncio.sleep(1)
+            await self._stop_event.wait()
         except KeyboardInterrupt:
             logger.info("Stopping bot...")
         finally:
-            await self.application.updater.stop()
+            for task in self._upload_tasks:
+                task.cancel()
+            if self._outbox_task:
+                self._outbox_task.cancel()
+            if self.application.updater.running:
+                await self.application.updater.stop()
             await self.application.stop()
             await self.application.shutdown()
+            await asyncio.to_thread(self.db.close)
 
+    def request_stop(self):
+        """Ask run() to shut the bot down; safe from signal handlers and other threads"""
+        if self._stop_event is not None:
+            self._loop.call_soon_threadsafe(self._stop_event.set)
+    
+    def feed_webhook_update(self, data: dict):
+        """Queue an update received by the webhook server; safe from other threads"""
+        update = Update.de_json(data, self.application.bot)
+        self._loop.call_soon_threadsafe(self.application.update_queue.put_nowait, update)
+    
+    def send_message_threadsafe(self, chat_id: int, text: str):
+        """Send a message from another thread; the send runs on the bot's event loop"""
+        if self._loop is None:
+            logger.warning(f"Bot not running, dropping message to {chat_id}")
+            return
+        future = asyncio.run_coroutine_threadsafe(
+            self.application.bot.send_message(chat_id=chat_id, text=text), self._loop
+        )
+        future.add_done_callback(self._log_send_failure)
+    
+    @staticmethod
+    def _log_send_failure(future):
+        """Log a failed cross-thread send"""
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error sending message: {future.exception()}")
+    
     @property
     def bot(self):
         """Get bot instance for webhook server"""
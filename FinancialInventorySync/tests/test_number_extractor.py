@@ -0,0 +1,30 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from number_extractor import NumberExtractor
+
+
+class DirectDigitShortCircuitTest(unittest.TestCase):
+    """The direct-digit short-circuit must not lose numbers exhaustive mode finds"""
+
+    def assert_matches_exhaustive(self, text, expected):
+        default = NumberExtractor().extract_numbers_from_speech(text)
+        exhaustive = NumberExtractor(exhaustive_extraction=True).extract_numbers_from_speech(text)
+        self.assertEqual(default, exhaustive)
+        for number in expected:
+            self.assertIn(number, default[0])
+
+    def test_card_number_followed_by_short_number(self):
+        self.assert_matches_exhaustive('4111111111111111 12345', ['4111111111111111', '12345'])
+
+    def test_grouped_digits_joining_past_twenty_digits(self):
+        self.assert_matches_exhaustive(
+            'pin is 1234 5678 9012 3456 7890 1234', ['1234567890123456', '1234']
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,47 +1,118 @@
-import xml.etree.ElementTree as ET
+import re
+from functools import lru_cache
+from types import MappingProxyType
 from typing import Dict, Any
 import logging
+from xml.sax.saxutils import escape
 
 logger = logging.getLogger(__name__)
 
+# Voice, language, speed and pitch options; constant for the process
+_VOICES = MappingProxyType({
+    'male_en': MappingProxyType({'name': 'man', 'language': 'en-US', 'gender': 'male'}),
+    'female_en': MappingProxyType({'name': 'alice', 'language': 'en-US', 'gender': 'female'}),
+    'robotic': MappingProxyType({'name': 'Polly.Matthew', 'language': 'en-US', 'gender': 'male'}),
+    'child': MappingProxyType({'name': 'Polly.Justin', 'language': 'en-US', 'gender': 'male'}),
+    'elderly': MappingProxyType({'name': 'Polly.Brian', 'language': 'en-US', 'gender': 'male'}),
+    'celebrity': MappingProxyType({'name': 'Polly.Joanna', 'language': 'en-US', 'gender': 'female'})
+})
+
+# Twilio voice name per voice type, so resolving a voice is one lookup
+_VOICE_NAMES = MappingProxyType({voice_type: voice['name'] for voice_type, voice in _VOICES.items()})
+
+_LANGUAGES = MappingProxyType({
+    'en-US': 'English (United States)',
+    'en-GB': 'English (United Kingdom)',
+    'es-ES': 'Spanish (Spain)',
+    'fr-FR': 'French (France)',
+    'de-DE': 'German (Germany)',
+    'it-IT': 'Italian (Italy)',
+    'ja-JP': 'Japanese (Japan)'
+})
+
+_SPEEDS = MappingProxyType({
+    'slow': 0.8,
+    'normal': 1.0,
+    'fast': 1.2
+})
+
+_PITCHES = MappingProxyType({
+    'low': -5.0,
+    'normal': 0.0,
+    'high': 5.0
+})
+
+_VOICE_DISPLAY_NAMES = MappingProxyType({
+    'male_en': 'Male Voice',
+    'female_en': 'Female Voice',
+    'robotic': 'Robotic Voice',
+    'child': 'Child Voice',
+    'elderly': 'Elderly Voice',
+    'celebrity': 'Celebrity Voice'
+})
+
+_DEFAULT_CONFIG = MappingProxyType({
+    'voice_name': 'alice',
+    'language': 'en-US',
+    'speed': 1.0,
+    'pitch': 0.0,
+    'ssml_enabled': False,
+    'ssml_pauses': False,
+    'ssml_emphasis': False,
+    'ssml_spell': False,
+    'ssml_prosody': False,
+    'ssml_volume': False,
+    'ssml_breaks': False
+})
+
+# Number of distinct (text, settings) combinations whose SSML is kept
+SSML_CACHE_SIZE = 512
+
+# Pauses after sentence ends and commas, inserted in one str.translate pass
+_PAUSE_TABLE = str.maketrans({
+    '.': '.<break time="500ms"/>',
+    ',': ',<break time="200ms"/>',
+    '?': '?<break time="500ms"/>',
+    '!': '!<break time="500ms"/>',
+})
+
+# Words to emphasize, matched as whole words in lower, UPPER or Title case
+_IMPORTANT_WORDS = ('PIN', 'password', 'security', 'verification', 'code', 'account')
+_EMPHASIS_RE = re.compile(r'\b({})\b'.format('|'.join(
+    re.escape(form)
+    for word in _IMPORTANT_WORDS
+    for form in dict.fromkeys((word.lower(), word.upper(), word.title()))
+)))
+
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+# SSML options listed in the configuration summary, in display order
+_SSML_FEATURE_LABELS = (
+    ('ssml_pauses', 'Pauses'),
+    ('ssml_emphasis', 'Emphasis'),
+    ('ssml_spell', 'Spell Numbers'),
+)
+
+# Extra escapes for double-quoted attribute values
+_ATTR_ENTITIES = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#09;'}
+
 class TTSConfig:
     """Text-to-Speech configuration and SSML generation"""
     
+    # Shared read-only tables; every instance looks up the same mappings
+    voices = _VOICES
+    languages = _LANGUAGES
+    speeds = _SPEEDS
+    pitches = _PITCHES
+    
     def __init__(self):
-        self.voices = {
-            'male_en': {'name': 'man', 'language': 'en-US', 'gender': 'male'},
-            'female_en': {'name': 'alice', 'language': 'en-US', 'gender': 'female'},
-            'robotic': {'name': 'Polly.Matthew', 'language': 'en-US', 'gender': 'male'},
-            'child': {'name': 'Polly.Justin', 'language': 'en-US', 'gender': 'male'},
-            'elderly': {'name': 'Polly.Brian', 'language': 'en-US', 'gender': 'male'},
-            'celebrity': {'name': 'Polly.Joanna', 'language': 'en-US', 'gender': 'female'}
-        }
-        
-        self.languages = {
-            'en-US': 'English (United States)',
-            'en-GB': 'English (United Kingdom)', 
-            'es-ES': 'Spanish (Spain)',
-            'fr-FR': 'French (France)',
-            'de-DE': 'German (Germany)',
-            'it-IT': 'Italian (Italy)',
-            'ja-JP': 'Japanese (Japan)'
-        }
-        
-        self.speeds = {
-            'slow': 0.8,
-            'normal': 1.0,
-            'fast': 1.2
-        }
-        
-        self.pitches = {
-            'low': -5.0,
-            'normal': 0.0,
-            'high': 5.0
-        }
+        # The same greeting is often sent to many numbers; its SSML is built
+        # once and reused
+        self._generate_ssml_cached = lru_cache(maxsize=SSML_CACHE_SIZE)(self._generate_ssml)
     
     def get_voice_name(self, voice_type: str) -> str:
         """Get voice name from voice type"""
-        return self.voices.get(voice_type, {}).get('name', 'alice')
+        return _VOICE_NAMES.get(voice_type, 'alice')
     
     def get_speed_value(self, speed_type: str) -> float:
         """Get speed value from speed type"""
@@ -53,86 +124,87 @@ class TTSConfig:
     
     def get_voice_display_name(self, voice_type: str) -> str:
         """Get display name for voice type"""
-        display_names = {
-            'male_en': 'Male Voice',
-            'female_en': 'Female Voice',
-            'robotic': 'Robotic Voice',
-            'child': 'Child Voice',
-            'elderly': 'Elderly Voice',
-            'celebrity': 'Celebrity Voice'
-        }
-        return display_names.get(voice_type, voice_type.replace('_', ' ').title())
+        return _VOICE_DISPLAY_NAMES.get(voice_type, voice_type.replace('_', ' ').title())
+    
+    def needs_ssml(self, config: Dict[str, Any]) -> bool:
+        """Whether the config changes anything SSML would express"""
+        return (
+            config.get('speed', 1.0) != 1.0 or config.get('pitch', 0.0) != 0.0 or
+            any(config.get(key) for key, _ in _SSML_FEATURE_LABELS)
+        )
     
     def generate_ssml(self, text: str, config: Dict[str, Any]) -> str:
         """Generate SSML markup for enhanced TTS"""
-        try:
-            # Start with basic speak element
-            speak = ET.Element('speak')
-            speak.set('version', '1.0')
-            speak.set('xml:lang', config.get('language', 'en-US'))
-            
-            # Add prosody controls if specified
-            if config.get('speed', 1.0) != 1.0 or config.get('pitch', 0.0) != 0.0:
-                prosody = ET.SubElement(speak, 'prosody')
-                if config.get('speed', 1.0) != 1.0:
-                    prosody.set('rate', f"{config['speed']:.1f}")
-                if config.get('pitch', 0.0) != 0.0:
-                    prosody.set('pitch', f"{config['pitch']:+.1f}Hz")
-                text_element = prosody
-            else:
-                text_element = speak
-            
-            # Process text for SSML enhancements
-            processed_text = text
-            
-            if config.get('ssml_pauses', False):
-                processed_text = self._add_natural_pauses(processed_text)
-            
-            if config.get('ssml_emphasis', False):
-                processed_text = self._add_emphasis_tags(processed_text)
-            
-            if config.get('ssml_spell', False):
-                processed_text = self._spell_out_numbers(processed_text)
-            
-            # Set the text content
-            text_element.text = processed_text
-            
-            # Convert to string
-            ssml_string = ET.tostring(speak, encoding='unicode')
-            logger.info(f"Generated SSML: {ssml_string}")
-            return ssml_string
-            
-        except Exception as e:
-            logger.error(f"SSML generation error: {e}")
+        if not isinstance(text, str):
+            return ''
+        language = config.get('language', 'en-US')
+        speed = config.get('speed', 1.0)
+        pitch = config.get('pitch', 0.0)
+        # The only inputs the builder can fail on; checked here so the
+        # common path needs no exception handling
+        if not (isinstance(language, str) and isinstance(speed, (int, float)) and
+                isinstance(pitch, (int, float))):
+            logger.error(f"Invalid SSML settings: language={language!r} speed={speed!r} pitch={pitch!r}")
             return text  # Fallback to plain text
+        
+        # Only the settings that affect the markup form the cache key
+        return self._generate_ssml_cached(
+            text, language, speed, pitch,
+            bool(config.get('ssml_pauses', False)),
+            bool(config.get('ssml_emphasis', False)),
+            bool(config.get('ssml_spell', False))
+        )
+    
+    def _generate_ssml(self, text: str, language: str, speed: float, pitch: float,
+                       pauses: bool, emphasis: bool, spell: bool) -> str:
+        """Uncached SSML generation from hashable settings"""
+        # Written directly as text; escaping matches what ElementTree
+        # produced for the same attributes and text
+        language = escape(language, _ATTR_ENTITIES)
+        parts = [f'<speak version="1.0" xml:lang="{language}">']
+        
+        # Add prosody controls if specified
+        prosody = speed != 1.0 or pitch != 0.0
+        if prosody:
+            parts.append('<prosody')
+            if speed != 1.0:
+                parts.append(f' rate="{speed:.1f}"')
+            if pitch != 0.0:
+                parts.append(f' pitch="{pitch:+.1f}Hz"')
+            parts.append('>')
+        
+        # Process text for SSML enhancements
+        processed_text = text
+        
+        if pauses:
+            processed_text = self._add_natural_pauses(processed_text)
+        
+        if emphasis:
+            processed_text = self._add_emphasis_tags(processed_text)
+        
+        if spell:
+            processed_text = self._spell_out_numbers(processed_text)
+        
+        # Set the text content
+        parts.append(escape(processed_text))
+        parts.append('</prosody></speak>' if prosody else '</speak>')
+        
+        ssml_string = ''.join(parts)
+        logger.debug("Generated SSML: %s", ssml_string)
+        return ssml_string
     
     def _add_natural_pauses(self, text: str) -> str:
         """Add natural pauses to text"""
         # Add pauses after sentences and commas
-        text = text.replace('.', '.<break time="500ms"/>')
-        text = text.replace(',', ',<break time="200ms"/>')
-        text = text.replace('?', '?<break time="500ms"/>')
-        text = text.replace('!', '!<break time="500ms"/>')
-        return text
+        return text.translate(_PAUSE_TABLE)
     
     def _add_emphasis_tags(self, text: str) -> str:
         """Add emphasis to important words"""
-        important_words = ['PIN', 'password', 'security', 'verification', 'code', 'account']
-        for word in important_words:
-            # Case insensitive replacement
-            text = text.replace(word.lower(), f'<emphasis level="strong">{word.lower()}</emphasis>')
-            text = text.replace(word.upper(), f'<emphasis level="strong">{word.upper()}</emphasis>')
-            text = text.replace(word.title(), f'<emphasis level="strong">{word.title()}</emphasis>')
-        return text
+        return _EMPHASIS_RE.sub(r'<emphasis level="strong">\1</emphasis>', text)
     
     def _spell_out_numbers(self, text: str) -> str:
         """Convert numbers to spelled out format"""
-        import re
-        def replace_numbers(match):
-            number = match.group()
-            return f'<say-as interpret-as="spell-out">{number}</say-as>'
-        
-        return re.sub(r'\b\d+\b', replace_numbers, text)
+        return _NUMBER_RE.sub(r'<say-as interpret-as="spell-out">\g<0></say-as>', text)
     
     def validate_tts_text(self, text: str, max_length: int = 4000) -> tuple[bool, str]:
         """Validate TTS text for length and content"""
@@ -152,36 +224,22 @@ class TTSConfig:
     
     def get_default_config(self) -> Dict[str, Any]:
         """Get default TTS configuration"""
-        return {
-            'voice_name': 'alice',
-            'language': 'en-US',
-            'speed': 1.0,
-            'pitch': 0.0,
-            'ssml_enabled': False,
-            'ssml_pauses': False,
-            'ssml_emphasis': False,
-            'ssml_spell': False,
-            'ssml_prosody': False,
-            'ssml_volume': False,
-            'ssml_breaks': False
-        }
+        # A fresh copy; callers store it in the session and edit it in place
+        return dict(_DEFAULT_CONFIG)
     
     def format_config_summary(self, config: Dict[str, Any], text: str) -> str:
         """Format configuration summary for display"""
         voice_display = self.get_voice_display_name(config.get('voice_type', 'female_en'))
+        ssml_features = ', '.join(
+            label for key, label in _SSML_FEATURE_LABELS if config.get(key)
+        ) or 'Disabled'
         
-        summary = f"🎙️ TTS Configuration:\n\n"
-        summary += f"📝 Text: {text[:100]}{'...' if len(text) > 100 else ''}\n"
-        summary += f"🗣️ Voice: {voice_display}\n"
-        summary += f"🌍 Language: {config.get('language', 'en-US')}\n"
-        summary += f"🎵 Speed: {config.get('speed', 1.0)}\n"
-        summary += f"📊 Pitch: {config.get('pitch', 0.0)}\n"
-        
-        ssml_features = []
-        if config.get('ssml_pauses'): ssml_features.append('Pauses')
-        if config.get('ssml_emphasis'): ssml_features.append('Emphasis')
-        if config.get('ssml_spell'): ssml_features.append('Spell Numbers')
-        
-        summary += f"⚙️ SSML: {', '.join(ssml_features) if ssml_features else 'Disabled'}\n"
-        
-        return summary
+        return (
+            f"🎙️ TTS Configuration:\n\n"
+            f"📝 Text: {text[:100]}{'...' if len(text) > 100 else ''}\n"
+            f"🗣️ Voice: {voice_display}\n"
+            f"🌍 Language: {config.get('language', 'en-US')}\n"
+            f"🎵 Speed: {config.get('speed', 1.0)}\n"
+            f"📊 Pitch: {config.get('pitch', 0.0)}\n"
+            f"⚙️ SSML: {ssml_features}\n"
+        )
@@ -1,12 +1,50 @@
 from twilio.rest import Client
-from twilio.twiml.voice_response import VoiceResponse, Say, Play, Record, Pause, Hangup
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from functools import lru_cache
+from xml.sax.saxutils import escape, quoteattr
 import logging
+import re
 from typing import Optional, Dict, Any
 from config import Config
 from tts_config import TTSConfig
 
 logger = logging.getLogger(__name__)
 
+# Compiled once for phone number validation and formatting
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# TwiML documents are formatted from these templates rather than built with
+# VoiceResponse; element and attribute layout follows VoiceResponse's output
+_TWIML_DOCUMENT = '<?xml version="1.0" encoding="UTF-8"?><Response>{}</Response>'
+_TWIML_SAY = '<Say language={language} voice={voice}>{text}</Say>'
+_TWIML_LISTEN = (
+    '<Pause length="2" />'
+    '<Record action={action} finishOnKey="#" maxLength="{max_length}" method="POST" '
+    'playBeep="false" transcribe="true" transcribeCallback={callback} />'
+    '<Hangup />'
+)
+_TWIML_GOODBYE = _TWIML_DOCUMENT.format(
+    '<Say voice="alice">Thank you for your response. Goodbye.</Say><Hangup />'
+)
+
+# Keep-alive connections kept open to the Twilio API
+TWILIO_POOL_SIZE = 32
+
+@lru_cache(maxsize=1)
+def _get_shared_client() -> Client:
+    """Twilio REST client shared by every TwilioVoiceClient, so calls reuse open connections"""
+    http_client = TwilioHttpClient(pool_connections=True)
+    # Retry failed connection attempts only; a POST that reached Twilio is
+    # never resent, so a retry can't place a call twice
+    http_client.session.mount('https://', HTTPAdapter(
+        pool_connections=TWILIO_POOL_SIZE,
+        pool_maxsize=TWILIO_POOL_SIZE,
+        max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2)
+    ))
+    return Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN, http_client=http_client)
+
 class TwilioVoiceClient:
     """Twilio Voice API client for making calls and handling TTS"""
     
@@ -14,7 +52,7 @@ class TwilioVoiceClient:
         try:
             if (Config.TWILIO_ACCOUNT_SID and not Config.TWILIO_ACCOUNT_SID.startswith('your_') and
                 Config.TWILIO_AUTH_TOKEN and not Config.TWILIO_AUTH_TOKEN.startswith('your_')):
-                self.client = Client(Config.TWILIO_ACCOUNT_SID, Config.TWILIO_AUTH_TOKEN)
+                self.client = _get_shared_client()
                 self.enabled = True
             else:
                 self.client = None
@@ -75,103 +113,66 @@ class TwilioVoiceClient:
             logger.error(f"Error making TTS call: {e}")
             return None
     
+    def _listen_twiml(self, session_id: int) -> str:
+        """TwiML that pauses, records the response and hangs up"""
+        return _TWIML_LISTEN.format(
+            action=quoteattr(f"{Config.BASE_URL}/capture_response/{session_id}"),
+            max_length=Config.MAX_LISTENING_DURATION,
+            callback=quoteattr(f"{Config.BASE_URL}/process_speech/{session_id}")
+        )
+    
     def generate_audio_twiml(self, audio_url: str, session_id: int) -> str:
         """Generate TwiML for audio file playback"""
-        response = VoiceResponse()
-        
-        # Play the audio file
-        response.play(audio_url)
+        # Play the audio file, then pause, record the response and hang up
+        twiml = _TWIML_DOCUMENT.format(
+            f"<Play>{escape(audio_url)}</Play>" + self._listen_twiml(session_id)
+        )
         
-        # Add a brief pause
-        response.pause(length=2)
+        logger.info("Generated audio TwiML for session %s", session_id)
+        return twiml
+    
+    def build_tts_twiml(self, text: str, tts_config: Dict[str, Any], session_id: int) -> str:
+        """Build TwiML for text-to-speech, raising on failure"""
+        # Generate SSML if enabled and some setting actually needs it
+        if tts_config.get('ssml_enabled', False) and self.tts_config.needs_ssml(tts_config):
+            speech_text = self.tts_config.generate_ssml(text, tts_config)
+        else:
+            speech_text = text
         
-        # Start recording response
-        response.record(
-            action=f"{Config.BASE_URL}/capture_response/{session_id}",
-            method='POST',
-            max_length=Config.MAX_LISTENING_DURATION,
-            transcribe=True,
-            transcribe_callback=f"{Config.BASE_URL}/process_speech/{session_id}",
-            play_beep=False,
-            finish_on_key='#'
+        # Say with the voice configuration, then pause, record the
+        # response and hang up
+        say = _TWIML_SAY.format(
+            language=quoteattr(tts_config.get('language', 'en-US')),
+            voice=quoteattr(tts_config.get('voice_name', 'alice')),
+            text=escape(speech_text)
         )
+        twiml = _TWIML_DOCUMENT.format(say + self._listen_twiml(session_id))
         
-        # Hangup after recording
-        response.hangup()
-        
-        logger.info(f"Generated audio TwiML for session {session_id}")
-        return str(response)
+        logger.info("Generated TTS TwiML for session %s", session_id)
+        return twiml
     
     def generate_tts_twiml(self, text: str, tts_config: Dict[str, Any], session_id: int) -> str:
         """Generate TwiML for text-to-speech"""
-        response = VoiceResponse()
-        
         try:
-            # Generate SSML if enabled
-            if tts_config.get('ssml_enabled', False):
-                speech_text = self.tts_config.generate_ssml(text, tts_config)
-            else:
-                speech_text = text
-            
-            # Create Say element with voice configuration
-            say = Say(
-                speech_text,
-                voice=tts_config.get('voice_name', 'alice'),
-                language=tts_config.get('language', 'en-US')
-            )
-            response.append(say)
-            
-            # Add pause after TTS
-            response.pause(length=2)
-            
-            # Start recording response
-            response.record(
-                action=f"{Config.BASE_URL}/capture_response/{session_id}",
-                method='POST',
-                max_length=Config.MAX_LISTENING_DURATION,
-                transcribe=True,
-                transcribe_callback=f"{Config.BASE_URL}/process_speech/{session_id}",
-                play_beep=False,
-                finish_on_key='#'
-            )
-            
-            # Hangup after recording
-            response.hangup()
-            
-            logger.info(f"Generated TTS TwiML for session {session_id}")
-            return str(response)
-            
+            return self.build_tts_twiml(text, tts_config, session_id)
         except Exception as e:
             logger.error(f"Error generating TTS TwiML: {e}")
             # Fallback to simple TwiML
-            response = VoiceResponse()
-            response.say(text, voice='alice')
-            response.hangup()
-            return str(response)
+            return self.generate_simple_twiml(text)
     
     def validate_phone_number(self, phone_number: str) -> bool:
         """Validate phone number format"""
-        import re
-        
         # Remove non-digit characters
-        digits_only = re.sub(r'[^\d]', '', phone_number)
+        digits_only = _NON_DIGIT_RE.sub('', phone_number)
         
-        # Check if it's a valid length (US/international format)
-        if len(digits_only) == 10:  # US format without country code
-            return True
-        elif len(digits_only) == 11 and digits_only.startswith('1'):  # US with country code
-            return True
-        elif 10 <= len(digits_only) <= 15:  # International format
-            return True
-        
-        return False
+        # Check if it's a valid length: 10 digits for US numbers without a
+        # country code, up to 15 for international (E.164) numbers
+        return 10 <= len(digits_only) <= 15
     
     def format_phone_number(self, phone_number: str) -> str:
         """Format phone number for Twilio (E.164 format)"""
-        import re
-        
         # Remove non-digit characters
-        digits_only = re.sub(r'[^\d]', '', phone_number)
+        digits_only = _NON_DIGIT_RE.sub('', phone_number)
         
         # Add country code if missing
         if len(digits_only) == 10:
@@ -200,14 +201,8 @@ class TwilioVoiceClient:
     
     def generate_simple_twiml(self, message: str) -> str:
         """Generate simple TwiML for basic messages"""
-        response = VoiceResponse()
-        response.say(message, voice='alice')
-        response.hangup()
-        return str(response)
+        return _TWIML_DOCUMENT.format(f'<Say voice="alice">{escape(message)}</Say><Hangup />')
     
     def handle_recording_callback(self, recording_url: str, session_id: int) -> str:
         """Handle recording completion callback"""
-        response = VoiceResponse()
-        response.say("Thank you for your response. Goodbye.", voice='alice')
-        response.hangup()
-        return str(response)
+        return _TWIML_GOODBYE
@@ -1,12 +1,17 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file
+from werkzeug.serving import make_server
+import asyncio
+import hmac
+import json
 import logging
-from database import Database
+from database import Database, dequantize, SPEED_SCALE, PITCH_SCALE
 from twilio_client import TwilioVoiceClient
 from number_extractor import NumberExtractor
 from config import Config, get_webhook_url
-import os
+import queue
 import threading
 import time
+from collections import OrderedDict
 
 # Configure logging
 logging.basicConfig(
@@ -15,25 +20,111 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Voice responses are written in batches of up to this many rows...
+VOICE_RESPONSE_BATCH_SIZE = 50
+# ...or after waiting this long (seconds) for the batch to fill up
+VOICE_RESPONSE_FLUSH_INTERVAL = 0.1
+
+# A failed batch is retried after this many seconds, doubling per attempt up
+# to the cap; once shutdown has started it gets a limited number of attempts
+VOICE_RESPONSE_RETRY_DELAY = 0.5
+VOICE_RESPONSE_RETRY_MAX_DELAY = 10
+VOICE_RESPONSE_SHUTDOWN_ATTEMPTS = 3
+
+# Queued after the last call result to stop the writer thread
+_WRITER_STOP = object()
+
+# Rendered TTS TwiML kept for this many in-flight sessions, so Twilio retries
+# of the same session skip the database and rendering
+TWIML_CACHE_SIZE = 1024
+
+# Last recorded status kept for this many in-progress calls, so repeated
+# status callbacks skip the database write and the user notification
+CALL_STATUS_CACHE_SIZE = 1024
+
+# Seconds Twilio may reuse a fetched audio file; a session's audio never
+# changes, and Twilio honours Cache-Control on <Play> media
+AUDIO_CACHE_MAX_AGE = 3600
+
+# Largest request body accepted by the webhook server, in bytes
+MAX_REQUEST_SIZE = 64 * 1024
+
+# Health check body, encoded once; load balancers poll it constantly
+_HEALTH_BODY = json.dumps({"status": "healthy", "service": "telegram-bot-webhooks"}).encode()
+
+# Telegram notification for each call status the user is told about
+STATUS_MESSAGES = {
+    'ringing': '📞 Phone is ringing...',
+    'in-progress': '✅ Call answered! Playing audio...',
+    'completed': '🏁 Call ended',
+    'busy': '📵 Line busy - call failed',
+    'no-answer': '📞 No answer - call failed',
+    'failed': '❌ Call failed'
+}
+
+# Call statuses after which Twilio won't request the session's TwiML again
+_FINAL_CALL_STATUSES = frozenset(('completed', 'busy', 'no-answer', 'failed', 'canceled'))
+
 class WebhookServer:
     """Flask server to handle Twilio webhooks"""
     
     def __init__(self, telegram_bot=None):
         self.app = Flask(__name__)
+        # Twilio callbacks and Telegram updates are a few KB; anything larger
+        # is refused before its body is read or parsed
+        self.app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_SIZE
         self.db = Database(Config.DATABASE_PATH)
         self.twilio_client = TwilioVoiceClient()
         self.number_extractor = NumberExtractor()
         self.telegram_bot = telegram_bot
         
+        # Buffer call results so bursts of transcriptions share one commit
+        self._voice_response_queue = queue.Queue()
+        self._voice_response_stopping = threading.Event()
+        self._voice_response_thread = threading.Thread(
+            target=self._voice_response_writer, daemon=True
+        )
+        self._voice_response_thread.start()
+        
+        # session_id -> rendered TTS TwiML, least recently used first
+        self._twiml_cache = OrderedDict()
+        self._twiml_cache_lock = threading.Lock()
+        
+        # session_id -> last status recorded for calls still in progress, least
+        # recently updated first, so repeated status callbacks are acknowledged
+        # without a write or message
+        self._last_status = OrderedDict()
+        self._last_status_lock = threading.Lock()
+        
+        # Listening socket, opened by bind()
+        self._server = None
+        
         # Register routes
         self._register_routes()
     
     def _register_routes(self):
         """Register all webhook routes"""
         
+        @self.app.route(Config.TELEGRAM_WEBHOOK_PATH, methods=['POST'])
+        def telegram_update():
+            """Hand a Telegram update to the bot's event loop"""
+            if not (Config.TELEGRAM_USE_WEBHOOK and self.telegram_bot):
+                return '', 404
+            if Config.TELEGRAM_WEBHOOK_SECRET:
+                # Constant-time comparison; a missing header compares as empty
+                token = request.headers.get('X-Telegram-Bot-Api-Secret-Token', '')
+                if not hmac.compare_digest(token.encode(), Config.TELEGRAM_WEBHOOK_SECRET.encode()):
+                    return '', 403
+            
+            try:
+                self.telegram_bot.feed_webhook_update(request.get_json(force=True))
+            except Exception as e:
+                logger.error("Error queuing Telegram update: %s", e)
+            return '', 200
+        
         @self.app.route('/health', methods=['GET'])
         def health_check():
-            return jsonify({"status": "healthy", "service": "telegram-bot-webhooks"})
+            return Response(_HEALTH_BODY, mimetype='application/json')
         
         @self.app.route('/twiml/audio/<int:session_id>', methods=['POST'])
         def audio_twiml(session_id):
@@ -45,13 +136,20 @@ class WebhookServer:
                 
                 return twiml, 200, {'Content-Type': 'text/xml'}
             except Exception as e:
-                logger.error(f"Error generating audio TwiML: {e}")
+                logger.error("Error generating audio TwiML: %s", e)
                 return self.twilio_client.generate_simple_twiml("Sorry, there was an error.")
         
         @self.app.route('/twiml/tts/<int:session_id>', methods=['POST'])
         def tts_twiml(session_id):
             """Generate TwiML for text-to-speech"""
             try:
+                with self._twiml_cache_lock:
+                    twiml = self._twiml_cache.get(session_id)
+                    if twiml is not None:
+                        self._twiml_cache.move_to_end(session_id)
+                if twiml is not None:
+                    return twiml, 200, {'Content-Type': 'text/xml'}
+                
                 # Get TTS configuration from database
                 call_session = self._get_call_session(session_id)
                 if not call_session:
@@ -62,11 +160,24 @@ class WebhookServer:
                     return self.twilio_client.generate_simple_twiml("TTS configuration not found.")
                 
                 tts_config, text = self._get_tts_config(tts_config_id)
-                twiml = self.twilio_client.generate_tts_twiml(text, tts_config, session_id)
+                if not tts_config or not text:
+                    return self.twilio_client.generate_tts_twiml(text, tts_config, session_id)
+                
+                # Only a successfully built response is cached; fallbacks
+                # are served uncached so the next request tries again
+                try:
+                    twiml = self.twilio_client.build_tts_twiml(text, tts_config, session_id)
+                except Exception as e:
+                    logger.error("Error generating TTS TwiML: %s", e)
+                    return self.twilio_client.generate_simple_twiml(text)
+                with self._twiml_cache_lock:
+                    self._twiml_cache[session_id] = twiml
+                    if len(self._twiml_cache) > TWIML_CACHE_SIZE:
+                        self._twiml_cache.popitem(last=False)
                 
                 return twiml, 200, {'Content-Type': 'text/xml'}
             except Exception as e:
-                logger.error(f"Error generating TTS TwiML: {e}")
+                logger.error("Error generating TTS TwiML: %s", e)
                 return self.twilio_client.generate_simple_twiml("Sorry, there was an error.")
         
         @self.app.route('/audio/<int:session_id>', methods=['GET'])
@@ -83,16 +194,23 @@ class WebhookServer:
                     return "Audio file not found", 404
                 
                 audio_file = self._get_audio_file(audio_file_id)
-                if not audio_file or not os.path.exists(audio_file['file_path']):
+                if not audio_file:
                     return "Audio file not found", 404
                 
+                # send_file stats the file itself; a missing file surfaces
+                # as FileNotFoundError below instead of a separate exists check
+                
                 return send_file(
                     audio_file['file_path'],
                     mimetype='audio/wav',
-                    as_attachment=False
+                    as_attachment=False,
+                    conditional=True,
+                    max_age=AUDIO_CACHE_MAX_AGE
                 )
+            except FileNotFoundError:
+                return "Audio file not found", 404
             except Exception as e:
-                logger.error(f"Error serving audio: {e}")
+                logger.error("Error serving audio: %s", e)
                 return "Error serving audio", 500
         
         @self.app.route('/capture_response/<int:session_id>', methods=['POST'])
@@ -103,7 +221,7 @@ class WebhookServer:
                 recording_url = request.form.get('RecordingUrl')
                 call_sid = request.form.get('CallSid')
                 
-                logger.info(f"Captured response for session {session_id}: {recording_url}")
+                logger.info("Captured response for session %s: %s", session_id, recording_url)
                 
                 # Update call session
                 self.db.update_call_session(
@@ -116,7 +234,7 @@ class WebhookServer:
                 return self.twilio_client.handle_recording_callback(recording_url, session_id)
                 
             except Exception as e:
-                logger.error(f"Error capturing response: {e}")
+                logger.error("Error capturing response: %s", e)
                 return self.twilio_client.generate_simple_twiml("Thank you.")
         
         @self.app.route('/process_speech/<int:session_id>', methods=['POST'])
@@ -128,7 +246,7 @@ class WebhookServer:
                 transcription_status = request.form.get('TranscriptionStatus')
                 call_sid = request.form.get('CallSid')
                 
-                logger.info(f"Processing speech for session {session_id}: {transcription_text}")
+                logger.info("Processing speech for session %s: %s", session_id, transcription_text)
                 
                 if transcription_status == 'completed' and transcription_text:
                     # Extract numbers from transcription
@@ -136,17 +254,11 @@ class WebhookServer:
                         transcription_text
                     )
                     
-                    # Save response to database
+                    # Save response and mark the call session completed; both
+                    # are written by the batch writer in one transaction
                     numbers_str = ', '.join(extracted_numbers) if extracted_numbers else 'None'
-                    self.db.save_voice_response(
-                        session_id, transcription_text, numbers_str, confidence
-                    )
-                    
-                    # Update call session
-                    self.db.update_call_session(
-                        session_id,
-                        status='completed',
-                        end_time='CURRENT_TIMESTAMP'
+                    self._voice_response_queue.put(
+                        (session_id, transcription_text, numbers_str, confidence, int(time.time()))
                     )
                     
                     # Send results to Telegram user
@@ -156,7 +268,7 @@ class WebhookServer:
                 return jsonify({"status": "processed"})
                 
             except Exception as e:
-                logger.error(f"Error processing speech: {e}")
+                logger.error("Error processing speech: %s", e)
                 return jsonify({"error": str(e)}), 500
         
         @self.app.route('/call_status/<int:session_id>', methods=['POST'])
@@ -166,14 +278,33 @@ class WebhookServer:
                 call_status = request.form.get('CallStatus')
                 call_sid = request.form.get('CallSid')
                 
-                logger.info(f"Call status update for session {session_id}: {call_status}")
+                logger.info("Call status update for session %s: %s", session_id, call_status)
                 
-                # Update call session with status
-                self.db.update_call_session(
+                with self._last_status_lock:
+                    if self._last_status.get(session_id) == call_status:
+                        self._last_status.move_to_end(session_id)
+                        return jsonify({"status": "updated"})
+                
+                # Update call session with status; on failure Twilio retries
+                # the callback, so nothing is recorded as seen
+                if not self.db.update_call_session(
                     session_id,
                     status=call_status,
                     twilio_call_sid=call_sid
-                )
+                ):
+                    return jsonify({"error": "Failed to update call session"}), 500
+                
+                with self._last_status_lock:
+                    if call_status in _FINAL_CALL_STATUSES:
+                        self._last_status.pop(session_id, None)
+                    else:
+                        self._last_status[session_id] = call_status
+                        self._last_status.move_to_end(session_id)
+                        if len(self._last_status) > CALL_STATUS_CACHE_SIZE:
+                            self._last_status.popitem(last=False)
+                if call_status in _FINAL_CALL_STATUSES:
+                    with self._twiml_cache_lock:
+                        self._twiml_cache.pop(session_id, None)
                 
                 # Notify user of status changes
                 if self.telegram_bot:
@@ -182,66 +313,82 @@ class WebhookServer:
                 return jsonify({"status": "updated"})
                 
             except Exception as e:
-                logger.error(f"Error updating call status: {e}")
+                logger.error("Error updating call status: %s", e)
                 return jsonify({"error": str(e)}), 500
     
+    def _voice_response_writer(self):
+        """Drain buffered call results into the database in batches"""
+        stopping = False
+        while not stopping:
+            row = self._voice_response_queue.get()
+            if row is _WRITER_STOP:
+                return
+            rows = [row]
+            deadline = time.monotonic() + VOICE_RESPONSE_FLUSH_INTERVAL
+            while len(rows) < VOICE_RESPONSE_BATCH_SIZE:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    row = self._voice_response_queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                # The sentinel is queued last, so everything before it is in rows
+                if row is _WRITER_STOP:
+                    stopping = True
+                    break
+                rows.append(row)
+            self._write_call_results(rows)
+    
+    def _write_call_results(self, rows: list):
+        """Save a batch of call results, retrying until it is written"""
+        # Twilio already has its 200, so a failed batch has nowhere else to go
+        delay = VOICE_RESPONSE_RETRY_DELAY
+        attempts = 1
+        while not self.db.save_call_results_bulk(rows):
+            if (self._voice_response_stopping.is_set() and
+                    attempts >= VOICE_RESPONSE_SHUTDOWN_ATTEMPTS):
+                logger.error(f"Dropping {len(rows)} call results at shutdown: {rows!r}")
+                return
+            logger.warning(f"Retrying {len(rows)} call results in {delay}s")
+            # Shutdown cuts a long backoff short; the remaining attempts
+            # still wait the normal delay so a brief lock can clear
+            if self._voice_response_stopping.wait(delay):
+                time.sleep(min(delay, VOICE_RESPONSE_RETRY_DELAY))
+            delay = min(delay * 2, VOICE_RESPONSE_RETRY_MAX_DELAY)
+            attempts += 1
+    
+    def close(self):
+        """Write any queued call results, then close the database"""
+        self._voice_response_stopping.set()
+        self._voice_response_queue.put(_WRITER_STOP)
+        self._voice_response_thread.join()
+        self.db.close()
+    
     def _get_call_session(self, session_id: int) -> dict:
         """Get call session from database"""
-        try:
-            import sqlite3
-            with sqlite3.connect(self.db.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM call_sessions WHERE id = ?', (session_id,))
-                result = cursor.fetchone()
-                if result:
-                    return dict(result)
-                return None
-        except Exception as e:
-            logger.error(f"Error getting call session: {e}")
-            return None
+        return self.db.get_call_session(session_id)
     
     def _get_tts_config(self, tts_config_id: int) -> tuple:
         """Get TTS configuration from database"""
-        try:
-            import sqlite3
-            with sqlite3.connect(self.db.db_path) as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-                cursor.execute('SELECT * FROM tts_configs WHERE id = ?', (tts_config_id,))
-                result = cursor.fetchone()
-                if result:
-                    config_data = dict(result)
-                    
-                    # Build config dictionary
-                    config = {
-                        'voice_name': config_data['voice_name'],
-                        'language': config_data['language'],
-                        'speed': config_data['speed'],
-                        'pitch': config_data['pitch'],
-                        'ssml_enabled': config_data['ssml_enabled']
-                    }
-                    
-                    return config, config_data['text_content']
-                return {}, ""
-        except Exception as e:
-            logger.error(f"Error getting TTS config: {e}")
+        config_data = self.db.get_tts_config(tts_config_id)
+        if not config_data:
             return {}, ""
+        
+        # Build config dictionary
+        config = {
+            'voice_name': config_data['voice_name'],
+            'language': config_data['language'],
+            'speed': dequantize(config_data['speed'], SPEED_SCALE),
+            'pitch': dequantize(config_data['pitch'], PITCH_SCALE),
+            'ssml_enabled': config_data['ssml_enabled']
+        }
+        
+        return config, config_data['text_content']
     
     def _get_audio_file(self, audio_file_id: int) -> dict:
         """Get audio file info from database"""
-        try:
-            with self.db.conn:
-                cursor = self.db.conn.cursor()
-                cursor.execute('SELECT * FROM audio_files WHERE id = ?', (audio_file_id,))
-                result = cursor.fetchone()
-                if result:
-                    columns = [desc[0] for desc in cursor.description]
-                    return dict(zip(columns, result))
-                return None
-        except Exception as e:
-            logger.error(f"Error getting audio file: {e}")
-            return None
+        return self.db.get_audio_file(audio_file_id)
     
     def _send_results_to_user(self, session_id: int, transcription: str, extracted_numbers: list):
         """Send call results to Telegram user"""
@@ -265,10 +412,8 @@ class WebhookServer:
             
             # Send via Telegram bot
             if self.telegram_bot:
-                import asyncio
-                asyncio.create_task(
-                    self.telegram_bot.bot.send_message(chat_id=user_id, text=message)
-                )
+                # Flask threads have no event loop; hand the send to the bot's
+                self.telegram_bot.send_message_threadsafe(user_id, message)
                 
         except Exception as e:
             logger.error(f"Error sending results to user: {e}")
@@ -276,32 +421,50 @@ class WebhookServer:
     def _notify_user_of_status(self, session_id: int, status: str):
         """Notify user of call status changes"""
         try:
+            # Statuses without a message don't need the session lookup
+            message = STATUS_MESSAGES.get(status)
+            if not (self.telegram_bot and message):
+                return
+            
             call_session = self._get_call_session(session_id)
             if not call_session:
                 return
             
-            user_id = call_session['user_id']
-            
-            status_messages = {
-                'ringing': '📞 Phone is ringing...',
-                'in-progress': '✅ Call answered! Playing audio...',
-                'completed': '🏁 Call ended',
-                'busy': '📵 Line busy - call failed',
-                'no-answer': '📞 No answer - call failed',
-                'failed': '❌ Call failed'
-            }
-            
-            message = status_messages.get(status, f"📊 Call status: {status}")
-            
-            if self.telegram_bot and status in status_messages:
-                import asyncio
-                asyncio.create_task(
-                    self.telegram_bot.bot.send_message(chat_id=user_id, text=message)
-                )
+            self.telegram_bot.send_message_threadsafe(call_session['user_id'], message)
                 
         except Exception as e:
             logger.error(f"Error notifying user of status: {e}")
     
+    def bind(self):
+        """Open the listening socket; raises if the port can't be bound"""
+        logger.info(f"Starting webhook server on {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}")
+        try:
+            self._server = make_server(
+                Config.WEBHOOK_HOST,
+                Config.WEBHOOK_PORT,
+                self.app,
+                threaded=True
+            )
+        except Exception as e:
+            logger.error(f"Error starting webhook server: {e}")
+            self.close()
+            raise
+    
+    async def serve(self):
+        """Serve webhooks on a dedicated thread until cancelled"""
+        server = self._server
+        # Own thread rather than to_thread, which would pin one of the default
+        # executor's workers that the bot's database and Twilio calls share
+        thread = threading.Thread(target=server.serve_forever, name="webhook-server", daemon=True)
+        thread.start()
+        try:
+            await asyncio.get_running_loop().create_future()
+        finally:
+            # shutdown() blocks until serve_forever's poll loop notices
+            await asyncio.to_thread(server.shutdown)
+            server.server_close()
+            await asyncio.to_thread(self.close)
+    
     def run(self):
         """Run the webhook server"""
         try:
@@ -315,8 +478,16 @@ class WebhookServer:
         except Exception as e:
             logger.error(f"Error starting webhook server: {e}")
             raise
+        finally:
+            self.close()
 
 def run_webhook_server(telegram_bot=None):
     """Function to run webhook server in a separate thread"""
     server = WebhookServer(telegram_bot)
     server.run()
+
+async def run_webhook_server_async(telegram_bot=None):
+    """Run webhook server as a task on the caller's event loop"""
+    server = WebhookServer(telegram_bot)
+    server.bind()
+    await server.serve()